@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import platform
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+# The connector package has no Home Assistant dependency, so it is importable on its own.
+sys.path.append(str(ROOT / "custom_components" / "looko2"))
+sys.path.insert(0, str(ROOT))
+
+from .harness import BenchmarkOptions, BenchmarkResult, find_regressions  # noqa: E402
+
+SUITES = ("connector", "home_assistant")
+
+
+def _parse_args() -> argparse.Namespace:
+    defaults = BenchmarkOptions()
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the LookO2 integration.")
+    parser.add_argument("--suite", choices=SUITES, action="append", help="suite to run, repeatable (default: all)")
+    parser.add_argument("--devices", type=int, default=defaults.devices, help="devices served by the fake API")
+    parser.add_argument("--selected", type=int, default=defaults.selected, help="devices fetched per refresh")
+    parser.add_argument("--iterations", type=int, default=defaults.iterations)
+    parser.add_argument("--warmup", type=int, default=defaults.warmup)
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="share of failed requests")
+    parser.add_argument("--backoff", type=float, default=defaults.backoff, help="retry backoff in seconds")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--output", type=Path, help="write JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median slowdown (default: 0.2)")
+    return parser.parse_args()
+
+
+async def _run_suites(suites: tuple[str, ...], options: BenchmarkOptions) -> tuple[list[BenchmarkResult], dict]:
+    results: list[BenchmarkResult] = []
+    skipped: dict[str, str] = {}
+    if "connector" in suites:
+        from .connector_suite import run_connector_suite
+
+        results.extend(await run_connector_suite(options))
+    if "home_assistant" in suites:
+        if importlib.util.find_spec("homeassistant") is None:
+            skipped["home_assistant"] = "homeassistant is not installed"
+        else:
+            from .home_assistant_suite import run_home_assistant_suite
+
+            results.extend(await run_home_assistant_suite(options))
+    return results, skipped
+
+
+def main() -> int:
+    args = _parse_args()
+    options = BenchmarkOptions(
+        devices=args.devices,
+        selected=args.selected,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        backoff=args.backoff,
+        seed=args.seed,
+    )
+    results, skipped = asyncio.run(_run_suites(tuple(args.suite or SUITES), options))
+
+    report: dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": asdict(options),
+        "results": {result.name: result.as_dict() for result in results},
+        "skipped": skipped,
+    }
+    regressions = []
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = find_regressions(report["results"], baseline["results"], args.threshold)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n")
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
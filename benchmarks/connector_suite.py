@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from aiohttp import ClientError, ClientSession
+
+from connector import LookO2Connector
+from connector.columnar import LookO2DeviceTable
+from connector.const import STREAM_CHUNK_SIZE, LookO2RefreshStrategy
+from connector.exceptions import LookO2Exception
+from connector.model import LookO2DeviceData
+from connector.parser import iter_json_array
+from connector.transport import LookO2RateLimiter, LookO2Transport
+
+from .harness import BenchmarkOptions, BenchmarkResult, measure
+from .server import FakeLookO2Server, create_device_record
+
+UNLIMITED_RATE = 1e9
+UNLIMITED_BURST = 1_000_000_000
+
+
+def create_transport(options: BenchmarkOptions) -> LookO2Transport:
+    # The production rate limit would dominate every measurement; the local server does not need it.
+    transport = LookO2Transport(backoff_base=options.backoff, backoff_max=options.backoff)
+    transport.rate_limiter = LookO2RateLimiter(UNLIMITED_RATE, UNLIMITED_BURST)
+    return transport
+
+
+async def run_connector_suite(options: BenchmarkOptions) -> list[BenchmarkResult]:
+    results = [
+        await _benchmark_from_dict(options),
+        await _benchmark_table(options),
+        await _benchmark_stream_parser(options),
+    ]
+
+    server = FakeLookO2Server(options.devices, options.latency, options.error_rate, options.seed)
+    await server.start()
+    try:
+        async with ClientSession() as session:
+            results.extend(await _benchmark_fetching(options, server, session))
+    finally:
+        await server.stop()
+    return results
+
+
+async def _benchmark_from_dict(options: BenchmarkOptions) -> BenchmarkResult:
+    records = [create_device_record(index) for index in range(options.devices)]
+
+    async def parse() -> None:
+        for record in records:
+            LookO2DeviceData.from_dict(record)
+
+    return await measure("parse_from_dict", options, parse, len(records))
+
+
+async def _benchmark_table(options: BenchmarkOptions) -> BenchmarkResult:
+    records = [create_device_record(index) for index in range(options.devices)]
+
+    async def parse() -> None:
+        LookO2DeviceTable.from_records(records)
+
+    return await measure("parse_table", options, parse, len(records))
+
+
+async def _benchmark_stream_parser(options: BenchmarkOptions) -> BenchmarkResult:
+    payload = json.dumps([create_device_record(index) for index in range(options.devices)]).encode()
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for offset in range(0, len(payload), STREAM_CHUNK_SIZE):
+            yield payload[offset:offset + STREAM_CHUNK_SIZE]
+
+    async def parse() -> None:
+        async for record, _ in iter_json_array(chunks()):
+            LookO2DeviceData.from_dict(record)
+
+    result = await measure("parse_stream", options, parse, options.devices)
+    result.extra["payload_bytes"] = len(payload)
+    return result
+
+
+async def _benchmark_fetching(
+        options: BenchmarkOptions,
+        server: FakeLookO2Server,
+        session: ClientSession,
+) -> list[BenchmarkResult]:
+    selected = server.device_ids(min(options.selected, options.devices))
+
+    def create_connector(strategy: LookO2RefreshStrategy) -> LookO2Connector:
+        return LookO2Connector(session, "benchmark", selected, refresh_strategy=strategy, api_url=server.api_url)
+
+    bulk = create_connector(LookO2RefreshStrategy.BULK)
+    per_device = create_connector(LookO2RefreshStrategy.PER_DEVICE)
+    return [
+        await _measure_fetch(
+            "fetch_all_devices", options, server, bulk, bulk.get_all_devices, options.devices
+        ),
+        await _measure_fetch(
+            "fetch_device_table", options, server, bulk, bulk.get_device_table, options.devices
+        ),
+        await _measure_fetch(
+            "fetch_bulk", options, server, bulk, bulk.get_devices_data, len(selected)
+        ),
+        await _measure_fetch(
+            "fetch_bulk_not_modified", options, server, bulk, bulk.get_devices_data, len(selected), revalidate=True
+        ),
+        await _measure_fetch(
+            "fetch_per_device", options, server, per_device, per_device.get_devices_data, len(selected)
+        ),
+        await _measure_fetch(
+            "fetch_per_device_not_modified", options, server, per_device, per_device.get_devices_data,
+            len(selected), revalidate=True,
+        ),
+    ]
+
+
+async def _measure_fetch(
+        name: str,
+        options: BenchmarkOptions,
+        server: FakeLookO2Server,
+        connector: LookO2Connector,
+        fetch: Callable[[], Awaitable[Any]],
+        operations: int,
+        revalidate: bool = False,
+) -> BenchmarkResult:
+    # A fresh transport per run bypasses the short response memo; revalidating runs keep the validators.
+    primed = create_transport(options)
+    if revalidate:
+        connector.transport = primed
+        await fetch()
+
+    requests_before = sum(server.requests.values())
+    errors_before = server.errors
+    counters = {"retries": 0, "failures": 0}
+
+    async def run() -> float:
+        connector.transport = create_transport(options)
+        if revalidate:
+            connector.transport.responses = primed.responses
+        start = time.perf_counter()
+        try:
+            await fetch()
+        except (ClientError, TimeoutError, LookO2Exception):
+            counters["failures"] += 1
+        elapsed = time.perf_counter() - start
+        counters["retries"] += connector.transport.retries
+        return elapsed
+
+    result = await measure(name, options, run, operations)
+    runs = options.warmup + options.iterations
+    result.extra.update(
+        requests_per_iteration=(sum(server.requests.values()) - requests_before) / runs,
+        injected_errors=server.errors - errors_before,
+        **counters,
+    )
+    return result
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Self
+
+
+@dataclass
+class BenchmarkOptions:
+    devices: int = 2000
+    selected: int = 20
+    iterations: int = 20
+    warmup: int = 2
+    latency: float = 0.0
+    error_rate: float = 0.0
+    backoff: float = 0.01
+    seed: int = 0
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    samples: list[float]
+    operations: int
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self: Self) -> dict[str, Any]:
+        samples = sorted(self.samples)
+        median = statistics.median(samples)
+        return {
+            "iterations": len(samples),
+            "operations": self.operations,
+            "min_ms": samples[0] * 1000,
+            "median_ms": median * 1000,
+            "mean_ms": statistics.fmean(samples) * 1000,
+            "p95_ms": samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))] * 1000,
+            "max_ms": samples[-1] * 1000,
+            "stdev_ms": statistics.stdev(samples) * 1000 if len(samples) > 1 else 0.0,
+            "operations_per_second": self.operations / median if median > 0 else None,
+            **self.extra,
+        }
+
+
+async def measure(
+        name: str,
+        options: BenchmarkOptions,
+        operation: Callable[[], Awaitable[float | None]],
+        operations: int = 1,
+        extra: Callable[[], dict[str, Any]] | None = None,
+) -> BenchmarkResult:
+    """Run an operation repeatedly; it may return its own timing to exclude setup work."""
+    for _ in range(options.warmup):
+        await operation()
+
+    samples = []
+    for _ in range(options.iterations):
+        start = time.perf_counter()
+        elapsed = await operation()
+        samples.append(time.perf_counter() - start if elapsed is None else elapsed)
+    return BenchmarkResult(name, samples, operations, extra() if extra is not None else {})
+
+
+def find_regressions(
+        results: dict[str, dict[str, Any]],
+        baseline: dict[str, dict[str, Any]],
+        threshold: float,
+) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None or previous["median_ms"] <= 0:
+            continue
+        change = result["median_ms"] / previous["median_ms"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{name}: median {previous['median_ms']:.3f} ms -> {result['median_ms']:.3f} ms (+{change:.0%})"
+            )
+    return regressions
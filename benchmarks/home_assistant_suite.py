@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import logging
+import tempfile
+import time
+from datetime import timedelta
+from types import MappingProxyType
+
+from aiohttp import ClientSession
+from homeassistant import bootstrap, loader
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.const import CONF_API_TOKEN, EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+from custom_components.looko2.connector import LookO2Connector
+from custom_components.looko2.connector.transport import LookO2RateLimiter, LookO2Transport
+from custom_components.looko2.const import CONF_DEVICE_IDS, DOMAIN
+from custom_components.looko2.coordinator import LookO2DataUpdateCoordinator
+from custom_components.looko2.scheduler import LookO2PollingScheduler
+from custom_components.looko2.sensor import SENSOR_TYPES, LookO2SensorEntity
+
+from .connector_suite import UNLIMITED_BURST, UNLIMITED_RATE
+from .harness import BenchmarkOptions, BenchmarkResult, measure
+from .server import FakeLookO2Server
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def run_home_assistant_suite(options: BenchmarkOptions) -> list[BenchmarkResult]:
+    server = FakeLookO2Server(options.devices, options.latency, options.error_rate, options.seed)
+    await server.start()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _create_home_assistant(config_dir)
+        try:
+            async with ClientSession() as session:
+                return await _benchmark_coordinator(options, hass, server, session)
+        finally:
+            await hass.async_stop(force=True)
+            await server.stop()
+
+
+async def _create_home_assistant(config_dir: str) -> HomeAssistant:
+    hass = HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    return hass
+
+
+async def _benchmark_coordinator(
+        options: BenchmarkOptions,
+        hass: HomeAssistant,
+        server: FakeLookO2Server,
+        session: ClientSession,
+) -> list[BenchmarkResult]:
+    device_ids = server.device_ids(min(options.selected, options.devices))
+    entry = ConfigEntry(
+        data={CONF_API_TOKEN: "benchmark"},
+        discovery_keys=MappingProxyType({}),
+        domain=DOMAIN,
+        minor_version=1,
+        options={CONF_DEVICE_IDS: device_ids},
+        source="user",
+        subentries_data=None,
+        title="Benchmark",
+        unique_id=None,
+        version=1,
+    )
+    connector = LookO2Connector(session, "benchmark", device_ids, api_url=server.api_url)
+    coordinator = LookO2DataUpdateCoordinator(hass, entry, connector)
+
+    def reset() -> None:
+        # Every run refetches all devices through an unthrottled transport without the response memo.
+        coordinator.scheduler = LookO2PollingScheduler()
+        connector.transport = LookO2Transport(backoff_base=options.backoff, backoff_max=options.backoff)
+        connector.transport.rate_limiter = LookO2RateLimiter(UNLIMITED_RATE, UNLIMITED_BURST)
+
+    async def refresh() -> float:
+        reset()
+        server.advance()
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        return time.perf_counter() - start
+
+    results = [await measure("coordinator_refresh", options, refresh, len(device_ids))]
+
+    platform = EntityPlatform(
+        hass=hass,
+        logger=_LOGGER,
+        domain="sensor",
+        platform_name=DOMAIN,
+        platform=None,
+        scan_interval=timedelta(seconds=30),
+        entity_namespace=None,
+    )
+    await platform.async_add_entities(
+        LookO2SensorEntity(device_id, coordinator, description)
+        for description in SENSOR_TYPES
+        for device_id in device_ids
+    )
+    entity_count = len(platform.entities)
+
+    state_writes = 0
+
+    @callback
+    def count_state_write(_: Event) -> None:
+        nonlocal state_writes
+        state_writes += 1
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, count_state_write)
+
+    for name, changed in (("entity_fanout_changed", True), ("entity_fanout_unchanged", False)):
+        await hass.async_block_till_done()
+        state_writes = 0
+
+        async def fan_out() -> float:
+            reset()
+            if changed:
+                server.advance()
+            coordinator.data = await coordinator.update_data()
+            start = time.perf_counter()
+            coordinator.async_update_listeners()
+            elapsed = time.perf_counter() - start
+            await hass.async_block_till_done()
+            return elapsed
+
+        result = await measure(name, options, fan_out, entity_count)
+        result.extra.update(
+            entities=entity_count,
+            state_writes_per_iteration=state_writes / (options.warmup + options.iterations),
+        )
+        results.append(result)
+
+    await platform.async_reset()
+    return results
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from typing import Self
+
+from aiohttp import web
+
+STREAM_CHUNK_SIZE = 16 * 1024
+BASE_EPOCH = 1_700_000_000
+
+
+def create_device_record(index: int, generation: int = 0) -> dict[str, str]:
+    pm25 = (index * 7 + generation * 3) % 120 + 1
+    return {
+        "Device": f"dev{index:05d}",
+        "Name": f"Station {index}",
+        "Epoch": str(BASE_EPOCH + generation * 300 + index % 300),
+        "Lat": f"{49.0 + (index % 400) * 0.01:.5f}",
+        "Lon": f"{14.1 + (index // 400) * 0.01:.5f}",
+        "PM1": str(pm25 // 2),
+        "PM25": str(pm25),
+        "PM10": str(pm25 + 10),
+        "HCHO": str(index % 3),
+        "AveragePM1": str(pm25 // 2),
+        "AveragePM25": str(pm25),
+        "AveragePM10": str(pm25 + 10),
+        "AverageHCHO": str(index % 3),
+        "IJP": str(pm25 // 20),
+        "IJPString": "Dobra",
+        "IJPStringEN": "Good",
+        "IJPDescription": "Jakość powietrza jest dobra.",
+        "IJPDescriptionEN": "Air quality is good.",
+        "PreviousIJP": str(pm25 // 20),
+        "Color": "#56B146",
+        "Temperature": f"{(index % 30) - 5}.5",
+        "Humidity": str(40 + index % 50),
+        "Indoor": "1" if index % 5 == 0 else "0",
+        "Hw": "v2",
+        "Sw": "1.0",
+    }
+
+
+class FakeLookO2Server:
+
+    def __init__(
+            self: Self,
+            device_count: int,
+            latency: float = 0.0,
+            error_rate: float = 0.0,
+            seed: int = 0,
+    ) -> None:
+        self.device_count = device_count
+        self.latency = latency
+        self.error_rate = error_rate
+        self.generation = 0
+        self.requests: dict[str, int] = {}
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._payload: bytes | None = None
+        self._runner: web.AppRunner | None = None
+        self._port: int | None = None
+
+    @property
+    def api_url(self: Self) -> str:
+        return f"http://127.0.0.1:{self._port}/?token={{token}}"
+
+    def device_ids(self: Self, count: int | None = None) -> list[str]:
+        return [f"dev{index:05d}" for index in range(self.device_count if count is None else count)]
+
+    def advance(self: Self) -> None:
+        self.generation += 1
+        self._payload = None
+
+    def all_devices_payload(self: Self) -> bytes:
+        if self._payload is None:
+            records = [create_device_record(index, self.generation) for index in range(self.device_count)]
+            self._payload = json.dumps(records).encode()
+        return self._payload
+
+    async def start(self: Self) -> None:
+        app = web.Application()
+        app.router.add_get("/", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self._port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self: Self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self: Self, request: web.Request) -> web.StreamResponse:
+        method = request.query.get("method", "")
+        self.requests[method] = self.requests.get(method, 0) + 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500, text="Injected error")
+
+        etag = f'"{self.generation}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+
+        if method == "GetAll":
+            return await self._stream_all_devices(request, etag)
+        if method == "GetLOOKO":
+            return self._device_data(request.query.get("id", ""), etag)
+        return web.Response(status=400, text="Unknown method")
+
+    async def _stream_all_devices(self: Self, request: web.Request, etag: str) -> web.StreamResponse:
+        payload = self.all_devices_payload()
+        response = web.StreamResponse(headers={"Content-Type": "application/json", "ETag": etag})
+        await response.prepare(request)
+        for offset in range(0, len(payload), STREAM_CHUNK_SIZE):
+            await response.write(payload[offset:offset + STREAM_CHUNK_SIZE])
+        await response.write_eof()
+        return response
+
+    def _device_data(self: Self, device_id: str, etag: str) -> web.Response:
+        index = int(device_id[3:]) if device_id.startswith("dev") and device_id[3:].isdigit() else -1
+        if not 0 <= index < self.device_count:
+            return web.json_response({})
+        return web.json_response(create_device_record(index, self.generation), headers={"ETag": etag})
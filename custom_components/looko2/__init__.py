@@ -1,48 +1,132 @@
 from __future__ import annotations
 
 import logging
+from functools import partial
+from typing import Any
 
-from aiohttp import ClientError
 from homeassistant.const import CONF_API_TOKEN
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import config_validation as cv, device_registry as dr, entity_registry as er
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.device_registry import DeviceRegistry
+from homeassistant.helpers.entity_registry import EntityRegistry, RegistryEntry
+from homeassistant.helpers.typing import ConfigType
 
 from .config_flow import LookO2ConfigEntry, LookO2RuntimeData
 from .connector import LookO2Connector
-from .connector.exceptions import LookO2Exception
-from .const import CONF_DEVICE_IDS, PLATFORMS, DOMAIN
-from .coordinator import LookO2DataUpdateCoordinator
+from .const import CONF_DAILY_REQUEST_BUDGET, CONF_DEVICE_IDS, CONF_PUSH, CONF_REGION, PLATFORMS, DOMAIN
+from .coordinator import (
+    LookO2DataUpdateCoordinator,
+    LookO2RegionCoordinator,
+    budget_store,
+    history_store,
+    long_term_statistics_store,
+    snapshot_store,
+)
+from .pool import async_get_device_pool
+from .push import async_register_push
+from .services import async_setup_services
+from .transports import async_get_transports
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: LookO2ConfigEntry) -> bool:
+    if CONF_REGION in entry.options:
+        return await _async_setup_region_entry(hass, entry)
+
     device_ids: list[str] = entry.options[CONF_DEVICE_IDS]
     token: str = entry.data[CONF_API_TOKEN]
 
     client_session = async_get_clientsession(hass)
-    look_o2_connector = LookO2Connector(client_session, token, device_ids)
+    transport = async_get_transports(hass).async_acquire(token, entry.entry_id)
+    look_o2_connector = LookO2Connector(client_session, token, device_ids, transport=transport)
+    budget = look_o2_connector.transport.budget
+    budget.set_limit(entry.entry_id, entry.options.get(CONF_DAILY_REQUEST_BUDGET) or None)
+    entry.async_on_unload(lambda: budget.set_limit(entry.entry_id, None))
+
+    look_o2_update_coordinator = LookO2DataUpdateCoordinator(hass, entry, look_o2_connector)
+    entry.async_on_unload(async_get_device_pool(hass).async_register(look_o2_update_coordinator))
+    await look_o2_update_coordinator.async_restore_history()
+    await look_o2_update_coordinator.async_restore_long_term_statistics()
+    await look_o2_update_coordinator.async_restore_budget()
+    restored = await look_o2_update_coordinator.async_restore_snapshot()
+    if not restored:
+        await look_o2_update_coordinator.async_config_entry_first_refresh()
+    entry.runtime_data = LookO2RuntimeData(look_o2_update_coordinator)
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    if entry.options.get(CONF_PUSH, False):
+        entry.async_on_unload(async_register_push(hass, entry))
 
-    try:
-        device_data = await look_o2_connector.get_all_device_data()
-    except (ClientError, TimeoutError, LookO2Exception) as err:
-        raise ConfigEntryNotReady from err
+    if restored:
+        entry.async_create_background_task(
+            hass, look_o2_update_coordinator.async_refresh(), f"{DOMAIN}_{entry.entry_id}_refresh"
+        )
 
-    look_o2_update_coordinator = LookO2DataUpdateCoordinator(hass, look_o2_connector, device_data)
-    await look_o2_update_coordinator.async_config_entry_first_refresh()
-    entry.runtime_data = LookO2RuntimeData(look_o2_update_coordinator)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    return True
+
+
+async def _async_setup_region_entry(hass: HomeAssistant, entry: LookO2ConfigEntry) -> bool:
+    token: str = entry.data[CONF_API_TOKEN]
+    transport = async_get_transports(hass).async_acquire(token, entry.entry_id)
+    look_o2_connector = LookO2Connector(async_get_clientsession(hass), token, transport=transport)
+
+    look_o2_region_coordinator = LookO2RegionCoordinator(hass, entry, look_o2_connector)
+    await look_o2_region_coordinator.async_config_entry_first_refresh()
+    entry.runtime_data = LookO2RuntimeData(look_o2_region_coordinator)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     return True
 
 
+async def async_migrate_entry(hass: HomeAssistant, entry: LookO2ConfigEntry) -> bool:
+    if entry.version > 1:
+        return False
+
+    if entry.minor_version < 2:
+        # Unique IDs used to depend on which entry tracked a device first; they are now always scoped by entry.
+        entity_registry = er.async_get(hass)
+        await er.async_migrate_entries(hass, entry.entry_id, partial(_scope_unique_id, entity_registry, entry.entry_id))
+        hass.config_entries.async_update_entry(entry, minor_version=2)
+    return True
+
+
+def _scope_unique_id(entity_registry: EntityRegistry, entry_id: str, entity: RegistryEntry) -> dict[str, Any] | None:
+    prefix = "looko2_sensor_"
+    scoped_prefix = f"{prefix}{entry_id}_"
+    if not entity.unique_id.startswith(prefix) or entity.unique_id.startswith(scoped_prefix):
+        return None
+    unique_id = f"{scoped_prefix}{entity.unique_id.removeprefix(prefix)}"
+    if entity_registry.async_get_entity_id(entity.domain, DOMAIN, unique_id) is not None:
+        # An entity from before the owner switched already holds the scoped ID; it is kept with its history.
+        return None
+    return {"new_unique_id": unique_id}
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: LookO2ConfigEntry) -> bool:
     _remove_old_devices(hass, entry)
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded:
+        async_get_transports(hass).async_release(entry.data[CONF_API_TOKEN], entry.entry_id)
+    return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: LookO2ConfigEntry) -> None:
+    # An entry that never finished its setup was not unloaded, but may still hold the transport of its token.
+    async_get_transports(hass).async_release(entry.data[CONF_API_TOKEN], entry.entry_id)
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    await history_store(hass, entry.entry_id).async_remove()
+    await long_term_statistics_store(hass, entry.entry_id).async_remove()
+    await budget_store(hass, entry.entry_id).async_remove()
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: LookO2ConfigEntry) -> None:
@@ -55,12 +139,13 @@ def _remove_old_devices(hass: HomeAssistant, entry: LookO2ConfigEntry) -> None:
         device_registry, entry.entry_id
     )
     existing_ids = set(map(lambda ee: list(ee.identifiers)[0][1], existing_entries))
-    new_ids = set(entry.options[CONF_DEVICE_IDS])
-    _remove_devices(device_registry, set(existing_ids) - set(new_ids))
+    new_ids = set(entry.options.get(CONF_DEVICE_IDS, [])) | {entry.entry_id}
+    _remove_devices(device_registry, entry.entry_id, set(existing_ids) - set(new_ids))
 
 
-def _remove_devices(device_registry: DeviceRegistry, device_ids_to_remove: set[str]) -> None:
+def _remove_devices(device_registry: DeviceRegistry, entry_id: str, device_ids_to_remove: set[str]) -> None:
     for device_id in device_ids_to_remove:
         device = device_registry.async_get_device(identifiers={(DOMAIN, device_id)})
         if device is not None:
-            device_registry.async_remove_device(device.id)
+            # Devices tracked by other entries as well are only detached from this one.
+            device_registry.async_update_device(device.id, remove_config_entry_id=entry_id)
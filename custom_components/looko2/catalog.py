@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Self
+
+from aiohttp import ClientError
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util.hass_dict import HassKey
+
+from .connector import LookO2Connector
+from .connector.columnar import LookO2DeviceTable
+from .connector.exceptions import LookO2Exception
+from .connector.geo import LookO2SpatialIndex
+from .connector.model import LookO2DeviceData
+from .connector.transport import LookO2Transport
+from .const import CATALOG_TTL, DOMAIN
+from .transports import async_get_transports
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CATALOG: HassKey[LookO2DeviceCatalogCache] = HassKey(f"{DOMAIN}_catalog")
+
+
+@dataclass
+class LookO2DeviceCatalog:
+    devices: LookO2DeviceTable
+    fetched_at: float
+
+    @cached_property
+    def index(self: Self) -> LookO2SpatialIndex[LookO2DeviceData]:
+        return LookO2SpatialIndex(self.devices, latitudes=self.devices.latitude, longitudes=self.devices.longitude)
+
+    @property
+    def is_expired(self: Self) -> bool:
+        return time.monotonic() - self.fetched_at > CATALOG_TTL.total_seconds()
+
+
+class LookO2DeviceCatalogCache:
+
+    def __init__(self: Self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._catalogs: dict[str, LookO2DeviceCatalog] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._revalidating: set[str] = set()
+        self._transports: dict[str, LookO2Transport] = {}
+
+    async def async_get_catalog(self: Self, token: str) -> LookO2DeviceCatalog:
+        catalog = self._catalogs.get(token)
+        if catalog is None:
+            catalog = await self._async_fetch(token)
+        elif catalog.is_expired and token not in self._revalidating:
+            self._revalidating.add(token)
+            self._hass.async_create_background_task(self._async_revalidate(token), f"{DOMAIN}_catalog_revalidate")
+        return catalog
+
+    async def _async_revalidate(self: Self, token: str) -> None:
+        try:
+            await self._async_fetch(token)
+        except (ClientError, TimeoutError, LookO2Exception, ValueError) as err:
+            _LOGGER.debug("Failed to revalidate device catalog, keeping cached one: %s", err)
+        finally:
+            self._revalidating.discard(token)
+
+    async def _async_fetch(self: Self, token: str) -> LookO2DeviceCatalog:
+        async with self._locks.setdefault(token, asyncio.Lock()):
+            catalog = self._catalogs.get(token)
+            if catalog is not None and not catalog.is_expired:
+                return catalog
+
+            # Requests of configured tokens count against their entries' budget; the catalog's own transport keeps
+            # the validators of tokens without an entry, e.g. while a new entry is being configured.
+            transport = async_get_transports(self._hass).get(token) or self._transports.setdefault(
+                token, LookO2Transport()
+            )
+            connector = LookO2Connector(async_get_clientsession(self._hass), token, transport=transport)
+            devices = await connector.get_device_table()
+            if catalog is not None and devices is catalog.devices:
+                # Not modified since the last fetch, so the spatial index built for it stays valid as well.
+                catalog.fetched_at = time.monotonic()
+                return catalog
+            catalog = LookO2DeviceCatalog(devices, time.monotonic())
+            if len(devices) > 0:
+                self._catalogs[token] = catalog
+            return catalog
+
+
+@callback
+def async_get_device_catalog(hass: HomeAssistant) -> LookO2DeviceCatalogCache:
+    if DATA_CATALOG not in hass.data:
+        hass.data[DATA_CATALOG] = LookO2DeviceCatalogCache(hass)
+    return hass.data[DATA_CATALOG]
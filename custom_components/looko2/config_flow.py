@@ -1,35 +1,47 @@
 from __future__ import annotations
 
 import logging
-import math
 from dataclasses import dataclass
 from typing import Any, Self
 
 import voluptuous as vol
 from aiohttp import ClientError
+from homeassistant.components import webhook
 from homeassistant.config_entries import ConfigFlow, ConfigFlowResult, ConfigEntry, OptionsFlow
-from homeassistant.const import CONF_API_TOKEN
-from homeassistant.core import callback
+from homeassistant.const import CONF_API_TOKEN, CONF_LATITUDE, CONF_LONGITUDE, CONF_RADIUS, CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import (
+    LocationSelector,
+    LocationSelectorConfig,
     SelectOptionDict,
     SelectSelector,
     SelectSelectorConfig,
     SelectSelectorMode,
 )
 
+from .catalog import LookO2DeviceCatalog, async_get_device_catalog
 from .connector import LookO2Connector
 from .connector.exceptions import LookO2Exception
 from .connector.model import LookO2DeviceData
-from .const import CONF_DEVICE_IDS, DOMAIN, NAME
-from .coordinator import LookO2DataUpdateCoordinator
+from .const import (
+    CONF_DAILY_REQUEST_BUDGET,
+    CONF_DEVICE_IDS,
+    CONF_LONG_TERM_STATISTICS,
+    CONF_PUSH,
+    CONF_REGION,
+    DOMAIN,
+    NAME,
+    REGION_DEFAULT_RADIUS,
+)
+from .coordinator import LookO2DataUpdateCoordinator, LookO2RegionCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
 
 @dataclass
 class LookO2RuntimeData:
-    coordinator: LookO2DataUpdateCoordinator
+    coordinator: LookO2DataUpdateCoordinator | LookO2RegionCoordinator
 
 
 type LookO2ConfigEntry = ConfigEntry[LookO2RuntimeData]
@@ -37,35 +49,30 @@ type LookO2ConfigEntry = ConfigEntry[LookO2RuntimeData]
 
 class LookO2FlowHandler(ConfigFlow, domain=DOMAIN):
     VERSION = 1
+    MINOR_VERSION = 2
 
     def __init__(self: Self) -> None:
         self._token = None
-        self._all_devices = []
+        self._catalog: LookO2DeviceCatalog | None = None
 
     async def async_step_user(self: Self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
-
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
-
         errors = {}
 
         if user_input is not None:
-            client_session = async_get_clientsession(self.hass)
             self._token = user_input[CONF_API_TOKEN]
-            look_o2_connector = LookO2Connector(client_session, self._token)
 
             try:
-                self._all_devices = await look_o2_connector.get_all_devices()
+                self._catalog = await async_get_device_catalog(self.hass).async_get_catalog(self._token)
             except (ClientError, TimeoutError, LookO2Exception) as e:
                 errors["base"] = "cannot_connect"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
 
-            is_valid = len(self._all_devices) > 0
+            is_valid = self._catalog is not None and len(self._catalog.devices) > 0
             if is_valid:
                 self._token = self._token
-                return await self.async_step_device_ids()
+                return await self.async_step_mode()
             else:
                 errors[CONF_API_TOKEN] = "invalid_token"
 
@@ -74,6 +81,9 @@ class LookO2FlowHandler(ConfigFlow, domain=DOMAIN):
         })
         return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
 
+    async def async_step_mode(self: Self, _: dict[str, Any] | None = None) -> ConfigFlowResult:
+        return self.async_show_menu(step_id="mode", menu_options=["device_ids", "region"])
+
     async def async_step_device_ids(
             self: Self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -95,40 +105,39 @@ class LookO2FlowHandler(ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
-                return self.async_create_entry(title=NAME,
+                return self.async_create_entry(title=self._create_title(device_ids),
                                                data={CONF_API_TOKEN: self._token},
                                                options={CONF_DEVICE_IDS: device_ids},
                                                )
 
-        def device_distance_comparator(d: LookO2DeviceData) -> float:
-            return math.sqrt(
-                (self.hass.config.latitude - d.latitude) ** 2
-                +
-                (self.hass.config.longitude - d.longitude) ** 2
-            )
-
-        sorted_devices = sorted(self._all_devices, key=device_distance_comparator)
+        schema = _device_ids_schema(self.hass, self._catalog, [])
+        return self.async_show_form(step_id="device_ids", data_schema=schema, errors=errors)
 
-        options: list[SelectOptionDict] = [
-            SelectOptionDict(value=device_data.device_id, label=f"{device_data.name} ({device_data.device_id})")
-            for device_data in sorted_devices
-        ]
+    async def async_step_region(self: Self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        errors: dict[str, str] = {}
 
-        schema: vol.Schema = vol.Schema(
-            {
-                vol.Required(CONF_DEVICE_IDS, default=[]): SelectSelector(
-                    SelectSelectorConfig(
-                        options=options,
-                        multiple=True,
-                        custom_value=False,
-                        sort=False,
-                        mode=SelectSelectorMode.DROPDOWN,
-                    ),
+        if user_input is not None:
+            region = user_input[CONF_REGION]
+            stations = _stations_within(self._catalog, region)
+            if len(stations) == 0:
+                errors["base"] = "no_stations"
+            else:
+                return self.async_create_entry(
+                    title=f"{NAME} ({stations[0].name}, {region[CONF_RADIUS] / 1000:g} km)",
+                    data={CONF_API_TOKEN: self._token},
+                    options={CONF_REGION: region},
                 )
-            }
-        )
 
-        return self.async_show_form(step_id="device_ids", data_schema=schema, errors=errors)
+        schema = _region_schema(self.hass, None)
+        return self.async_show_form(step_id="region", data_schema=schema, errors=errors)
+
+    def _create_title(self: Self, device_ids: list[str]) -> str:
+        if len(self._async_current_entries()) == 0:
+            return NAME
+        names = [
+            device.name for device_id in device_ids if (device := self._catalog.devices.get(device_id)) is not None
+        ]
+        return f"{NAME} ({', '.join(sorted(names)[:2])}{', ...' if len(names) > 2 else ''})"
 
     @staticmethod
     @callback
@@ -136,19 +145,64 @@ class LookO2FlowHandler(ConfigFlow, domain=DOMAIN):
         return LookO2OptionsFlowHandler(config_entry)
 
 
+def _device_ids_schema(hass: HomeAssistant, catalog: LookO2DeviceCatalog, default: list[str]) -> vol.Schema:
+    # Every station stays selectable; the index only orders them by distance from home.
+    stations = catalog.index.nearest(hass.config.latitude, hass.config.longitude, len(catalog.index))
+    options: list[SelectOptionDict] = [
+        SelectOptionDict(
+            value=device_data.device_id,
+            label=f"{device_data.name} ({device_data.device_id}, {distance:.1f} km)",
+        )
+        for distance, device_data in stations
+    ]
+
+    return vol.Schema(
+        {
+            vol.Required(CONF_DEVICE_IDS, default=default): SelectSelector(
+                SelectSelectorConfig(
+                    options=options,
+                    multiple=True,
+                    custom_value=False,
+                    sort=False,
+                    mode=SelectSelectorMode.DROPDOWN,
+                ),
+            )
+        }
+    )
+
+
+def _region_schema(hass: HomeAssistant, default: dict[str, float] | None) -> vol.Schema:
+    if default is None:
+        default = {
+            CONF_LATITUDE: hass.config.latitude,
+            CONF_LONGITUDE: hass.config.longitude,
+            CONF_RADIUS: REGION_DEFAULT_RADIUS,
+        }
+    return vol.Schema(
+        {
+            vol.Required(CONF_REGION, default=default): LocationSelector(LocationSelectorConfig(radius=True)),
+        }
+    )
+
+
+def _stations_within(catalog: LookO2DeviceCatalog, region: dict[str, float]) -> list[LookO2DeviceData]:
+    radius_km = region.get(CONF_RADIUS, REGION_DEFAULT_RADIUS) / 1000
+    return [device for _, device in catalog.index.within(region[CONF_LATITUDE], region[CONF_LONGITUDE], radius_km)]
+
+
 # noinspection PyTypeChecker
 class LookO2OptionsFlowHandler(OptionsFlow):
 
     def __init__(self: Self, config_entry: LookO2ConfigEntry) -> None:
         self._config_entry = config_entry
-        self.look_o2_connector = config_entry.runtime_data.coordinator.look_o2_connector
-        self._all_devices = []
         self._options = dict(config_entry.options)
 
     async def async_step_init(
             self: Self,
             _: dict[str, Any] | None = None) -> ConfigFlowResult:  # pylint: disable=unused-argument
         """Manage the options."""
+        if CONF_REGION in self._options:
+            return await self.async_step_region()
         return await self.async_step_device_ids()
 
     async def async_step_device_ids(
@@ -157,14 +211,13 @@ class LookO2OptionsFlowHandler(OptionsFlow):
         """Handle the initial step."""
         errors: dict[str, str] = {}
 
-        self._all_devices = await self.look_o2_connector.get_all_devices()
+        token = self._config_entry.data[CONF_API_TOKEN]
 
         if user_input is not None:
             device_ids = user_input[CONF_DEVICE_IDS]
 
             client_session = async_get_clientsession(self.hass)
-            look_o2_connector = LookO2Connector(client_session, self._options.get(CONF_API_TOKEN),
-                                                device_ids=device_ids)
+            look_o2_connector = LookO2Connector(client_session, token, device_ids=device_ids)
 
             try:
                 await look_o2_connector.get_all_device_data()
@@ -174,40 +227,54 @@ class LookO2OptionsFlowHandler(OptionsFlow):
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
+                self._options[CONF_LONG_TERM_STATISTICS] = user_input[CONF_LONG_TERM_STATISTICS]
+                self._options[CONF_PUSH] = user_input[CONF_PUSH]
+                self._options[CONF_DAILY_REQUEST_BUDGET] = user_input[CONF_DAILY_REQUEST_BUDGET]
+                if self._options[CONF_PUSH] and CONF_WEBHOOK_ID not in self._options:
+                    self._options[CONF_WEBHOOK_ID] = webhook.async_generate_id()
                 output = await self._update_entry(device_ids)
                 await self.hass.config_entries.async_reload(self.config_entry.entry_id)
                 return output
 
-        def device_distance_comparator(d: LookO2DeviceData) -> float:
-            return math.sqrt(
-                (self.hass.config.latitude - d.latitude) ** 2
-                +
-                (self.hass.config.longitude - d.longitude) ** 2
-            )
-
-        sorted_devices = sorted(self._all_devices, key=device_distance_comparator)
+        try:
+            catalog = await async_get_device_catalog(self.hass).async_get_catalog(token)
+        except (ClientError, TimeoutError, LookO2Exception):
+            return self.async_abort(reason="cannot_connect")
 
-        options: list[SelectOptionDict] = [
-            SelectOptionDict(value=device_data.device_id, label=f"{device_data.name} ({device_data.device_id})")
-            for device_data in sorted_devices
-        ]
-
-        schema: vol.Schema = vol.Schema(
+        schema = _device_ids_schema(self.hass, catalog, self._options[CONF_DEVICE_IDS]).extend(
             {
-                vol.Required(CONF_DEVICE_IDS, default=self._options[CONF_DEVICE_IDS]): SelectSelector(
-                    SelectSelectorConfig(
-                        options=options,
-                        multiple=True,
-                        custom_value=False,
-                        sort=False,
-                        mode=SelectSelectorMode.DROPDOWN,
-                    ),
-                )
+                vol.Required(
+                    CONF_LONG_TERM_STATISTICS, default=self._options.get(CONF_LONG_TERM_STATISTICS, False)
+                ): bool,
+                vol.Required(CONF_PUSH, default=self._options.get(CONF_PUSH, False)): bool,
+                vol.Required(
+                    CONF_DAILY_REQUEST_BUDGET, default=self._options.get(CONF_DAILY_REQUEST_BUDGET, 0)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
             }
         )
-
         return self.async_show_form(step_id="device_ids", data_schema=schema, errors=errors)
 
     async def _update_entry(self: Self, device_ids: list[str]) -> ConfigFlowResult:
         self._options[CONF_DEVICE_IDS] = device_ids
         return self.async_create_entry(title=NAME, data=self._options)
+
+    async def async_step_region(self: Self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        errors: dict[str, str] = {}
+
+        token = self._config_entry.data[CONF_API_TOKEN]
+        try:
+            catalog = await async_get_device_catalog(self.hass).async_get_catalog(token)
+        except (ClientError, TimeoutError, LookO2Exception):
+            return self.async_abort(reason="cannot_connect")
+
+        if user_input is not None:
+            if len(_stations_within(catalog, user_input[CONF_REGION])) == 0:
+                errors["base"] = "no_stations"
+            else:
+                self._options[CONF_REGION] = user_input[CONF_REGION]
+                output = self.async_create_entry(title=NAME, data=self._options)
+                await self.hass.config_entries.async_reload(self.config_entry.entry_id)
+                return output
+
+        schema = _region_schema(self.hass, self._options[CONF_REGION])
+        return self.async_show_form(step_id="region", data_schema=schema, errors=errors)
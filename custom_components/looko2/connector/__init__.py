@@ -1,59 +1,375 @@
+import asyncio
+import hashlib
 import json
 import logging
+import math
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
 from typing import Any, Self
 
-from aiohttp import ClientSession
+from aiohttp import ClientError, ClientResponse, ClientSession
 
-from .const import API_URL_ALL_DEVICES, API_URL_DEVICE_DATA, TIMEOUT
+from .columnar import LookO2DeviceTable
+from .const import (
+    API_METHOD_ALL_DEVICES,
+    API_METHOD_DEVICE_DATA,
+    API_URL_ALL_DEVICES,
+    API_URL_BASE,
+    API_URL_DEVICE_DATA,
+    BULK_REFRESH_MIN_DEVICES,
+    LATENCY_SMOOTHING,
+    MAX_CONCURRENT_REQUESTS,
+    STREAM_CHUNK_SIZE,
+    TABLE_BATCH_SIZE,
+    TIMEOUT,
+    LookO2RefreshStrategy,
+)
 from .exceptions import (
+    LookO2Exception,
     LookO2UnauthorizedException,
     LookO2ApiException,
     LookO2MissingDataException,
     LookO2InvalidDeviceIdException
 )
-from .model import LookO2DeviceData, LookO2DevicesDataMap
+from .metrics import LookO2Metrics
+from .model import (
+    LookO2CachedResponse,
+    LookO2DeviceData,
+    LookO2DevicesDataMap,
+    LookO2DevicesFetchResult,
+    LookO2RawResponse,
+)
+from .parser import iter_json_array
+from .transport import LookO2Transport
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class LookO2Connector:
-    def __init__(self: Self, session: ClientSession, token: str, device_ids: list[str] | None = None) -> None:
+    def __init__(
+            self: Self,
+            session: ClientSession,
+            token: str,
+            device_ids: list[str] | None = None,
+            max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+            refresh_strategy: LookO2RefreshStrategy = LookO2RefreshStrategy.AUTO,
+            api_url: str = API_URL_BASE,
+            transport: LookO2Transport | None = None,
+    ) -> None:
         self._session = session
-        self._token = token
+        self._api_url = api_url.format(token=token)
         self._device_ids = device_ids
+        self._max_concurrent_requests = max_concurrent_requests
+        self._refresh_strategy = refresh_strategy
+        self._latencies: dict[str, float] = {}
+        self.metrics = LookO2Metrics()
+        # Connectors of the same token should share a transport, so they are paced and budgeted together.
+        self.transport = transport or LookO2Transport()
+
+    @property
+    def device_ids(self: Self) -> list[str] | None:
+        return self._device_ids
 
-    async def _get_data(self: Self, url: str) -> Any:
-        response = await self._session.get(url, timeout=TIMEOUT)
+    async def _get_raw_data(
+            self: Self,
+            url: str,
+            method: str,
+            cached: LookO2CachedResponse[Any] | None,
+    ) -> LookO2RawResponse | None:
+        headers = {} if cached is None else cached.conditional_headers
+        start = time.monotonic()
+        response = await self._session.get(url, timeout=TIMEOUT, headers=headers)
 
-        response_text = await response.text()
+        body = await response.read()
+        self._record_latency(method, time.monotonic() - start)
+        self.metrics.record_payload(method, len(body))
+        if response.status == 304 and cached is not None:
+            return None
+        self._raise_for_status(response.status, body.decode(errors="replace"))
 
-        if response.status in [401, 403]:
-            raise LookO2UnauthorizedException(response.status, response_text)
+        return LookO2RawResponse(body, response.headers.get("ETag"), response.headers.get("Last-Modified"))
 
+    async def _open_stream(self: Self, url: str, headers: dict[str, str]) -> ClientResponse | None:
+        response = await self._session.get(url, timeout=TIMEOUT, headers=headers)
+        if response.status == 304 and len(headers) > 0:
+            response.release()
+            return None
         if response.status != 200:
-            raise LookO2ApiException(response.status, response_text)
+            async with response:
+                self._raise_for_status(response.status, await response.text())
+        return response
+
+    @staticmethod
+    def _raise_for_status(status: int, response_text: str) -> None:
+        if status in [401, 403]:
+            raise LookO2UnauthorizedException(status, response_text)
+
+        if status != 200:
+            raise LookO2ApiException(status, response_text)
+
+    async def _execute[T](self: Self, operation: Callable[[], Awaitable[T]]) -> T:
+        attempts = 0
+
+        async def attempt() -> T:
+            nonlocal attempts
+            attempts += 1
+            self.metrics.requests += 1
+            if attempts > 1:
+                self.metrics.retries += 1
+            try:
+                result = await operation()
+            except (ClientError, TimeoutError, LookO2Exception) as err:
+                self.metrics.record_error(err)
+                raise
+            self.metrics.record_success()
+            return result
+
+        return await self.transport.execute(attempt)
+
+    def _record_latency(self: Self, method: str, latency: float) -> None:
+        self.metrics.record_latency(method, latency)
+        previous = self._latencies.get(method)
+        if previous is None:
+            self._latencies[method] = latency
+        else:
+            self._latencies[method] = previous + LATENCY_SMOOTHING * (latency - previous)
+
+    def estimate_requests(self: Self, device_count: int) -> int:
+        if device_count == 0:
+            return 0
+        return 1 if self.select_refresh_strategy(device_count) == LookO2RefreshStrategy.BULK else device_count
+
+    def select_refresh_strategy(self: Self, device_count: int) -> LookO2RefreshStrategy:
+        if self._refresh_strategy != LookO2RefreshStrategy.AUTO:
+            return self._refresh_strategy
+        if device_count >= BULK_REFRESH_MIN_DEVICES:
+            return LookO2RefreshStrategy.BULK
 
-        return json.loads(response_text)
+        bulk_latency = self._latencies.get(API_METHOD_ALL_DEVICES)
+        device_latency = self._latencies.get(API_METHOD_DEVICE_DATA)
+        if bulk_latency is None or device_latency is None:
+            return LookO2RefreshStrategy.PER_DEVICE
+
+        rounds = math.ceil(device_count / self._max_concurrent_requests)
+        if bulk_latency < rounds * device_latency:
+            return LookO2RefreshStrategy.BULK
+        return LookO2RefreshStrategy.PER_DEVICE
 
     async def get_all_devices(self: Self) -> list[LookO2DeviceData]:
-        url = API_URL_ALL_DEVICES.format(token=self._token)
-        data = await self._get_data(url)
-        devices = [LookO2DeviceData.from_dict(device_data) for device_data in data]
-        return devices
+        return list(await self.get_device_table())
+
+    async def get_device_table(self: Self) -> LookO2DeviceTable:
+        return await self.transport.coalesce(API_METHOD_ALL_DEVICES, self._fetch_device_table)
+
+    async def _fetch_device_table(self: Self) -> LookO2DeviceTable:
+        cached = self.transport.responses.get(API_METHOD_ALL_DEVICES)
+        start = time.monotonic()
+        response = await self._open_all_devices({} if cached is None else cached.conditional_headers)
+        if response is None:
+            self.transport.not_modified += 1
+            return cached.value
+
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        table = LookO2DeviceTable()
+        batch: list[dict[str, str]] = []
+        async with aclosing(self._iter_records(response, start)) as records:
+            async for device_data, _ in records:
+                batch.append(device_data)
+                if len(batch) == TABLE_BATCH_SIZE:
+                    table.extend(batch)
+                    batch = []
+        table.extend(batch)
+        # The table is only kept once it was read completely, so a 304 never stands for a partial one.
+        self.transport.responses[API_METHOD_ALL_DEVICES] = LookO2CachedResponse(b"", table, etag, last_modified)
+        return table
+
+    async def stream_all_devices(self: Self) -> AsyncIterator[LookO2DeviceData]:
+        start = time.monotonic()
+        response = await self._open_all_devices({})
+        async with aclosing(self._iter_records(response, start)) as records:
+            async for device_data, _ in records:
+                yield LookO2DeviceData.from_dict(device_data)
+
+    async def _open_all_devices(self: Self, headers: dict[str, str]) -> ClientResponse | None:
+        url = API_URL_ALL_DEVICES.format(api_url=self._api_url)
+        return await self._execute(lambda: self._open_stream(url, headers))
+
+    async def _iter_records(
+            self: Self,
+            response: ClientResponse,
+            start: float,
+    ) -> AsyncIterator[tuple[dict[str, str], str]]:
+        received = 0
+        waiting = 0.0
+
+        async def chunks() -> AsyncIterator[bytes]:
+            nonlocal received, waiting
+            iterator = response.content.iter_chunked(STREAM_CHUNK_SIZE)
+            while True:
+                wait_start = time.monotonic()
+                chunk = await anext(iterator, None)
+                waiting += time.monotonic() - wait_start
+                if chunk is None:
+                    return
+                received += len(chunk)
+                yield chunk
+
+        body_start = time.monotonic()
+        try:
+            async with response:
+                async for record in iter_json_array(chunks()):
+                    yield record
+        except (ClientError, TimeoutError, ValueError) as err:
+            self.metrics.record_error(err)
+            raise
+        finally:
+            # Also runs when the caller stops early; time not spent waiting for chunks went into decoding them.
+            end = time.monotonic()
+            self._record_latency(API_METHOD_ALL_DEVICES, end - start)
+            self.metrics.record_payload(API_METHOD_ALL_DEVICES, received)
+            self.metrics.record_parse(API_METHOD_ALL_DEVICES, end - body_start - waiting)
 
     async def get_all_device_data(self: Self) -> LookO2DevicesDataMap:
-        if self._device_ids is None:
+        result = await self.get_devices_data()
+        if not result.is_complete:
+            raise next(iter(result.errors.values()))
+        return result.data
+
+    async def get_devices_data(self: Self, device_ids: list[str] | None = None) -> LookO2DevicesFetchResult:
+        if device_ids is None:
+            device_ids = self._device_ids
+        if device_ids is None:
             raise LookO2MissingDataException("device_ids")
 
-        all_device_data = {device_id: await self.get_device_data(device_id) for device_id in self._device_ids}
-        return all_device_data
+        if self.select_refresh_strategy(len(device_ids)) == LookO2RefreshStrategy.BULK:
+            try:
+                return await self._get_devices_data_bulk(device_ids)
+            except (ClientError, TimeoutError, LookO2ApiException, ValueError, KeyError) as err:
+                _LOGGER.debug("Bulk refresh failed, falling back to per-device requests: %s", err)
+
+        return await self._get_devices_data_per_device(device_ids)
+
+    async def _get_devices_data_bulk(self: Self, device_ids: list[str]) -> LookO2DevicesFetchResult:
+        key = f"{API_METHOD_ALL_DEVICES}:{','.join(sorted(device_ids))}"
+        found, not_modified = await self.transport.coalesce(key, lambda: self._fetch_devices_bulk(set(device_ids)))
+
+        missing_ids = [device_id for device_id in device_ids if device_id not in found]
+        result = await self._get_devices_data_per_device(missing_ids)
+        fetched = {**found, **result.data}
+        result.data = {device_id: fetched[device_id] for device_id in device_ids if device_id in fetched}
+        result.not_modified |= not_modified & set(found)
+        return result
+
+    async def _fetch_devices_bulk(self: Self, device_ids: set[str]) -> tuple[LookO2DevicesDataMap, set[str]]:
+        found: LookO2DevicesDataMap = {}
+        not_modified: set[str] = set()
+        # Validators are kept per device set: a 304 only vouches for devices fingerprinted from that same response.
+        validators_key = f"{API_METHOD_ALL_DEVICES}@{_fingerprint(','.join(sorted(device_ids)).encode()).hex()}"
+        validators = self.transport.responses.get(validators_key)
+        cached_devices = {
+            device_id: self.transport.responses.get(f"{API_METHOD_ALL_DEVICES}:{device_id}")
+            for device_id in device_ids
+        }
+        headers = {}
+        if validators is not None and all(cached is not None for cached in cached_devices.values()):
+            headers = validators.conditional_headers
+
+        start = time.monotonic()
+        response = await self._open_all_devices(headers)
+        if response is None:
+            found = {device_id: cached.value for device_id, cached in cached_devices.items()}
+            self.transport.not_modified += len(found)
+            return found, set(found)
+
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+        async with aclosing(self._iter_records(response, start)) as records:
+            async for device_data, raw in records:
+                device_id = device_data.get("Device")
+                if device_id not in device_ids:
+                    continue
+                cached = cached_devices[device_id]
+                fingerprint = _fingerprint(raw.encode())
+                if cached is not None and cached.fingerprint == fingerprint:
+                    found[device_id] = cached.value
+                    not_modified.add(device_id)
+                else:
+                    found[device_id] = LookO2DeviceData.from_dict(device_data)
+                    self.transport.responses[f"{API_METHOD_ALL_DEVICES}:{device_id}"] = LookO2CachedResponse(
+                        fingerprint, found[device_id]
+                    )
+                if len(found) == len(device_ids):
+                    break
+
+        if len(found) == len(device_ids):
+            self.transport.responses[validators_key] = LookO2CachedResponse(b"", None, etag, last_modified)
+        else:
+            self.transport.responses.pop(validators_key, None)
+        self.transport.not_modified += len(not_modified)
+        return found, not_modified
+
+    async def _get_devices_data_per_device(self: Self, device_ids: list[str]) -> LookO2DevicesFetchResult:
+        semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+
+        async def fetch(device_id: str) -> tuple[LookO2DeviceData, bool]:
+            async with semaphore:
+                return await self._get_device_response(device_id)
+
+        outcomes = await asyncio.gather(*(fetch(device_id) for device_id in device_ids), return_exceptions=True)
+
+        result = LookO2DevicesFetchResult()
+        for device_id, outcome in zip(device_ids, outcomes):
+            # A malformed response of one device must not discard the readings of all the others.
+            if isinstance(outcome, Exception):
+                result.errors[device_id] = outcome
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                result.data[device_id], is_not_modified = outcome
+                if is_not_modified:
+                    result.not_modified.add(device_id)
+        return result
 
     async def get_device_data(self: Self, device_id: str) -> LookO2DeviceData:
-        url = API_URL_DEVICE_DATA.format(token=self._token, device_id=device_id)
-        data = await self._get_data(url)
+        device_data, _ = await self._get_device_response(device_id)
+        return device_data
+
+    async def _get_device_response(self: Self, device_id: str) -> tuple[LookO2DeviceData, bool]:
+        return await self.transport.coalesce(
+            f"{API_METHOD_DEVICE_DATA}:{device_id}", lambda: self._fetch_device_data(device_id)
+        )
+
+    async def _fetch_device_data(self: Self, device_id: str) -> tuple[LookO2DeviceData, bool]:
+        key = f"{API_METHOD_DEVICE_DATA}:{device_id}"
+        url = API_URL_DEVICE_DATA.format(api_url=self._api_url, device_id=device_id)
+        cached = self.transport.responses.get(key)
+        response = await self._execute(lambda: self._get_raw_data(url, API_METHOD_DEVICE_DATA, cached))
+
+        if response is None:
+            self.transport.not_modified += 1
+            return cached.value, True
+
+        fingerprint = _fingerprint(response.body)
+        if cached is not None and cached.fingerprint == fingerprint:
+            cached.etag = response.etag
+            cached.last_modified = response.last_modified
+            self.transport.not_modified += 1
+            return cached.value, True
+
+        parse_start = time.monotonic()
+        data = json.loads(response.body)
 
         if len(data) != 25:
             raise LookO2InvalidDeviceIdException(device_id)
 
         device_data = LookO2DeviceData.from_dict(data)
-        return device_data
+        self.metrics.record_parse(API_METHOD_DEVICE_DATA, time.monotonic() - parse_start)
+        self.transport.responses[key] = LookO2CachedResponse(
+            fingerprint, device_data, response.etag, response.last_modified
+        )
+        return device_data, False
+
+
+def _fingerprint(body: bytes) -> bytes:
+    return hashlib.blake2b(body, digest_size=16).digest()
@@ -0,0 +1,212 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Self, TextIO
+
+from aiohttp import ClientError, ClientSession
+
+from . import LookO2Connector
+from .const import API_URL_BASE, MAX_CONCURRENT_REQUESTS, LookO2RefreshStrategy
+from .exceptions import LookO2Exception, LookO2InvalidDeviceIdException
+from .geo import haversine_distance
+from .model import LookO2DeviceData
+
+_LOGGER = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+FIELD_NAMES = [field.name for field in fields(LookO2DeviceData)]
+
+
+@dataclass(frozen=True)
+class LookO2ExportFilter:
+    near: tuple[float, float, float] | None = None
+    bounding_box: tuple[float, float, float, float] | None = None
+    indoor: bool | None = None
+
+    def matches(self: Self, device: LookO2DeviceData) -> bool:
+        if self.indoor is not None and device.indoor != self.indoor:
+            return False
+        if self.bounding_box is not None:
+            min_latitude, min_longitude, max_latitude, max_longitude = self.bounding_box
+            if not (min_latitude <= device.latitude <= max_latitude
+                    and min_longitude <= device.longitude <= max_longitude):
+                return False
+        if self.near is not None:
+            latitude, longitude, radius_km = self.near
+            if haversine_distance(latitude, longitude, device.latitude, device.longitude) > radius_km:
+                return False
+        return True
+
+
+class LookO2NdjsonWriter:
+
+    def __init__(self: Self, stream: TextIO) -> None:
+        self._stream = stream
+
+    def write(self: Self, device: LookO2DeviceData) -> None:
+        self._stream.write(json.dumps(_to_record(device), ensure_ascii=False))
+        self._stream.write("\n")
+
+
+class LookO2CsvWriter:
+
+    def __init__(self: Self, stream: TextIO) -> None:
+        self._writer = csv.DictWriter(stream, fieldnames=FIELD_NAMES)
+        self._writer.writeheader()
+
+    def write(self: Self, device: LookO2DeviceData) -> None:
+        self._writer.writerow(_to_record(device))
+
+
+def _to_record(device: LookO2DeviceData) -> dict[str, Any]:
+    record = {name: getattr(device, name) for name in FIELD_NAMES}
+    record["timestamp"] = device.timestamp.isoformat()
+    return record
+
+
+async def _fetch_per_device(
+        connector: LookO2Connector,
+        device_ids: list[str],
+        concurrency: int,
+) -> AsyncIterator[tuple[str, LookO2DeviceData | Exception]]:
+    # At most `concurrency` requests are in flight and results are yielded as they complete, so memory stays bounded.
+    remaining = iter(device_ids)
+    pending: dict[asyncio.Task[LookO2DeviceData], str] = {}
+    try:
+        while True:
+            while len(pending) < concurrency and (device_id := next(remaining, None)) is not None:
+                pending[asyncio.create_task(connector.get_device_data(device_id))] = device_id
+            if len(pending) == 0:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                device_id = pending.pop(task)
+                try:
+                    yield device_id, task.result()
+                except (ClientError, TimeoutError, LookO2Exception) as err:
+                    yield device_id, err
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _fetch_bulk(
+        connector: LookO2Connector,
+        device_ids: list[str] | None,
+) -> AsyncIterator[tuple[str, LookO2DeviceData | Exception]]:
+    wanted = None if device_ids is None else set(device_ids)
+    async for device in connector.stream_all_devices():
+        if wanted is None:
+            yield device.device_id, device
+        elif device.device_id in wanted:
+            wanted.discard(device.device_id)
+            yield device.device_id, device
+            if len(wanted) == 0:
+                return
+    for device_id in sorted(wanted or ()):
+        yield device_id, LookO2InvalidDeviceIdException(device_id)
+
+
+async def export(
+        connector: LookO2Connector,
+        writer: LookO2NdjsonWriter | LookO2CsvWriter,
+        export_filter: LookO2ExportFilter,
+        device_ids: list[str] | None = None,
+        concurrency: int = MAX_CONCURRENT_REQUESTS,
+) -> tuple[int, int]:
+    """Write matching devices as they arrive and return the number of written and failed devices."""
+    if device_ids is None or connector.select_refresh_strategy(len(device_ids)) == LookO2RefreshStrategy.BULK:
+        records = _fetch_bulk(connector, device_ids)
+    else:
+        records = _fetch_per_device(connector, device_ids, concurrency)
+
+    written = 0
+    failed = 0
+    async for device_id, outcome in records:
+        if isinstance(outcome, Exception):
+            _LOGGER.warning("Failed to fetch device %s: %s", device_id, outcome)
+            failed += 1
+        elif export_filter.matches(outcome):
+            writer.write(outcome)
+            written += 1
+    return written, failed
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m connector", description="Export LookO2 readings.")
+    parser.add_argument("--token", default=os.environ.get("LOOKO2_TOKEN"), help="API token (default: $LOOKO2_TOKEN)")
+    parser.add_argument("--api-url", default=API_URL_BASE, help="API URL template with a {token} placeholder")
+    parser.add_argument("--device", dest="device_ids", action="append", help="device to export, repeatable")
+    parser.add_argument("--devices-file", type=Path, help="file with one device ID per line")
+    parser.add_argument("--strategy", choices=[strategy.value for strategy in LookO2RefreshStrategy],
+                        default=LookO2RefreshStrategy.AUTO.value, help="how device lists are fetched")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help="per-device requests in flight")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--output", type=Path, help="write to this file instead of stdout")
+    area = parser.add_mutually_exclusive_group()
+    area.add_argument("--near", type=float, nargs=3, metavar=("LAT", "LON", "RADIUS_KM"),
+                      help="only devices within a radius")
+    area.add_argument("--bbox", type=float, nargs=4, metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"),
+                      help="only devices within a bounding box")
+    placement = parser.add_mutually_exclusive_group()
+    placement.add_argument("--indoor", dest="indoor", action="store_const", const=True, help="only indoor devices")
+    placement.add_argument("--outdoor", dest="indoor", action="store_const", const=False, help="only outdoor devices")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    if args.token is None:
+        parser.error("--token or LOOKO2_TOKEN is required")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+
+def _read_device_ids(args: argparse.Namespace) -> list[str] | None:
+    device_ids = list(args.device_ids or [])
+    if args.devices_file is not None:
+        device_ids.extend(line.strip() for line in args.devices_file.read_text().splitlines() if line.strip())
+    return list(dict.fromkeys(device_ids)) or None
+
+
+async def _run(args: argparse.Namespace, stream: TextIO) -> tuple[int, int]:
+    writer = LookO2CsvWriter(stream) if args.format == "csv" else LookO2NdjsonWriter(stream)
+    export_filter = LookO2ExportFilter(
+        near=tuple(args.near) if args.near else None,
+        bounding_box=tuple(args.bbox) if args.bbox else None,
+        indoor=args.indoor,
+    )
+    async with ClientSession() as session:
+        connector = LookO2Connector(
+            session, args.token, refresh_strategy=LookO2RefreshStrategy(args.strategy), api_url=args.api_url
+        )
+        return await export(connector, writer, export_filter, _read_device_ids(args), args.concurrency)
+
+
+def main() -> int:
+    args = _parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, stream=sys.stderr,
+                        format="%(levelname)s: %(message)s")
+    start = time.monotonic()
+    try:
+        if args.output is None:
+            written, failed = asyncio.run(_run(args, sys.stdout))
+        else:
+            with args.output.open("w", newline="", encoding="utf-8") as stream:
+                written, failed = asyncio.run(_run(args, stream))
+    except (ClientError, TimeoutError, LookO2Exception) as err:
+        _LOGGER.error("Export failed: %s", err)
+        return 1
+    _LOGGER.info("Exported %s devices in %.1f s, %s failed", written, time.monotonic() - start, failed)
+    return 1 if failed > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import datetime
+import sys
+from array import array
+from collections.abc import Iterator, Sequence
+from functools import cached_property
+from operator import itemgetter
+from typing import Any, Final, Self, overload
+
+from .model import LookO2DeviceData
+
+_FLOAT_COLUMNS: Final = {
+    "pm1": "PM1",
+    "pm25": "PM25",
+    "pm10": "PM10",
+    "latitude": "Lat",
+    "longitude": "Lon",
+    "temperature": "Temperature",
+    "humidity": "Humidity",
+    "average_pm1": "AveragePM1",
+    "average_pm25": "AveragePM25",
+    "average_pm10": "AveragePM10",
+    "hcho": "HCHO",
+    "average_hcho": "AverageHCHO",
+}
+_INT_COLUMNS: Final = {
+    "timestamp": "Epoch",
+    "aqi": "IJP",
+    "previous_aqi": "PreviousIJP",
+}
+_STRING_COLUMNS: Final = {
+    "device_id": "Device",
+    "name": "Name",
+}
+_INTERNED_COLUMNS: Final = {
+    "aqi_string_pl": "IJPString",
+    "aqi_string_en": "IJPStringEN",
+    "aqi_description_pl": "IJPDescription",
+    "aqi_description_en": "IJPDescriptionEN",
+    "color": "Color",
+}
+
+
+class LookO2DeviceTable(Sequence[LookO2DeviceData]):
+
+    def __init__(self: Self) -> None:
+        self._columns: dict[str, Any] = {
+            **{name: array("d") for name in _FLOAT_COLUMNS},
+            **{name: array("q") for name in _INT_COLUMNS},
+            **{name: [] for name in (*_STRING_COLUMNS, *_INTERNED_COLUMNS)},
+            "indoor": array("b"),
+        }
+        self.latitude: array = self._columns["latitude"]
+        self.longitude: array = self._columns["longitude"]
+        self.device_ids: list[str] = self._columns["device_id"]
+
+    @classmethod
+    def from_records(cls: type[Self], records: Sequence[dict[str, str]]) -> Self:
+        table = cls()
+        table.extend(records)
+        return table
+
+    def extend(self: Self, records: Sequence[dict[str, str]]) -> None:
+        # Every column is converted with one map() over the whole batch, keeping the per-value work in C.
+        # All columns are converted before any is extended, so a malformed record leaves the table unchanged.
+        converted: dict[str, Any] = {}
+        for name, key in _FLOAT_COLUMNS.items():
+            converted[name] = array("d", map(float, map(itemgetter(key), records)))
+        for name, key in _INT_COLUMNS.items():
+            converted[name] = array("q", map(int, map(itemgetter(key), records)))
+        for name, key in _STRING_COLUMNS.items():
+            converted[name] = list(map(itemgetter(key), records))
+        for name, key in _INTERNED_COLUMNS.items():
+            converted[name] = list(map(sys.intern, map(itemgetter(key), records)))
+        converted["indoor"] = array("b", map("0".__eq__, map(itemgetter("Indoor"), records)))
+
+        for name, values in converted.items():
+            self._columns[name].extend(values)
+        self.__dict__.pop("_positions", None)
+
+    def __len__(self: Self) -> int:
+        return len(self.device_ids)
+
+    @overload
+    def __getitem__(self: Self, index: int) -> LookO2DeviceData: ...
+
+    @overload
+    def __getitem__(self: Self, index: slice) -> list[LookO2DeviceData]: ...
+
+    def __getitem__(self: Self, index: int | slice) -> LookO2DeviceData | list[LookO2DeviceData]:
+        if isinstance(index, slice):
+            return [self.row(position) for position in range(*index.indices(len(self)))]
+        return self.row(index)
+
+    def __iter__(self: Self) -> Iterator[LookO2DeviceData]:
+        return (self.row(position) for position in range(len(self)))
+
+    def row(self: Self, index: int) -> LookO2DeviceData:
+        values = {name: column[index] for name, column in self._columns.items()}
+        values["timestamp"] = datetime.datetime.fromtimestamp(values["timestamp"])
+        values["indoor"] = bool(values["indoor"])
+        return LookO2DeviceData(**values)
+
+    @cached_property
+    def _positions(self: Self) -> dict[str, int]:
+        return {device_id: position for position, device_id in enumerate(self.device_ids)}
+
+    def get(self: Self, device_id: str) -> LookO2DeviceData | None:
+        position = self._positions.get(device_id)
+        return None if position is None else self.row(position)
+
+    def column(self: Self, name: str) -> Sequence[Any]:
+        return self._columns[name]
@@ -1,9 +1,52 @@
+from enum import StrEnum
 from typing import Final
 
 from aiohttp import ClientTimeout
 
+API_METHOD_ALL_DEVICES: Final = "GetAll"
+API_METHOD_DEVICE_DATA: Final = "GetLOOKO"
+
 API_URL_BASE: Final = "https://api.looko2.com/?token={token}"
-API_URL_ALL_DEVICES: Final = f"{API_URL_BASE}&method=GetAll"
-API_URL_DEVICE_DATA: Final = f"{API_URL_BASE}&method=GetLOOKO&id={{device_id}}"
+API_URL_ALL_DEVICES: Final = f"{{api_url}}&method={API_METHOD_ALL_DEVICES}"
+API_URL_DEVICE_DATA: Final = f"{{api_url}}&method={API_METHOD_DEVICE_DATA}&id={{device_id}}"
 
 TIMEOUT = ClientTimeout(total=10)
+STREAM_CHUNK_SIZE: Final = 64 * 1024
+TABLE_BATCH_SIZE: Final = 512
+
+MAX_CONCURRENT_REQUESTS: Final = 4
+
+MAX_RETRIES: Final = 2
+RETRY_BACKOFF_BASE: Final = 1.0
+RETRY_BACKOFF_MAX: Final = 10.0
+
+CIRCUIT_BREAKER_FAILURE_THRESHOLD: Final = 5
+CIRCUIT_BREAKER_RESET_TIMEOUT: Final = 300.0
+
+RATE_LIMIT_PER_SECOND: Final = 5.0
+RATE_LIMIT_BURST: Final = 10
+
+TRANSPORT_DECISIONS_HISTORY: Final = 20
+
+BUDGET_WINDOW: Final = 86400
+BUDGET_PACE_WINDOW: Final = 3600
+BUDGET_BUCKET_SECONDS: Final = 60
+BUDGET_RESERVE: Final = 0.05
+BUDGET_LOW_WATERMARK: Final = 0.25
+BUDGET_MAX_STRETCH: Final = 8.0
+
+RESPONSE_MEMO_TTL: Final = 10.0
+
+BULK_REFRESH_MIN_DEVICES: Final = 8
+LATENCY_SMOOTHING: Final = 0.3
+
+LATENCY_BUCKETS: Final = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PAYLOAD_SIZE_BUCKETS: Final = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+PARSE_TIME_BUCKETS: Final = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+ERROR_RATE_WINDOW: Final = 100
+
+
+class LookO2RefreshStrategy(StrEnum):
+    AUTO = "auto"
+    BULK = "bulk"
+    PER_DEVICE = "per_device"
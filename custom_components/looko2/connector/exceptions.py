@@ -29,3 +29,19 @@ class LookO2InvalidDeviceIdException(LookO2Exception):
     def __init__(self: Self, device_id: str) -> None:
         super().__init__(f'Invalid device id: {device_id}')
         self.device_id = device_id
+
+
+class LookO2RequestRefusedException(LookO2Exception):
+    def __init__(self: Self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LookO2CircuitOpenException(LookO2RequestRefusedException):
+    def __init__(self: Self, retry_after: float) -> None:
+        super().__init__(f'Api unavailable, retrying in {retry_after:.0f}s', retry_after)
+
+
+class LookO2BudgetExhaustedException(LookO2RequestRefusedException):
+    def __init__(self: Self, retry_after: float) -> None:
+        super().__init__(f'Daily request budget exhausted, retrying in {retry_after:.0f}s', retry_after)
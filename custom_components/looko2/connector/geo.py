@@ -0,0 +1,103 @@
+import heapq
+import math
+from collections.abc import Iterator, Sequence
+from typing import Final, Protocol, Self
+
+EARTH_RADIUS_KM: Final = 6371.0088
+KM_PER_DEGREE: Final = math.pi * EARTH_RADIUS_KM / 180
+GRID_CELL_SIZE: Final = 0.25
+
+
+class LookO2Located(Protocol):
+    latitude: float
+    longitude: float
+
+
+def haversine_distance(latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float) -> float:
+    phi_1 = math.radians(latitude_1)
+    phi_2 = math.radians(latitude_2)
+    delta_phi = phi_2 - phi_1
+    delta_lambda = math.radians(longitude_2 - longitude_1)
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi_1) * math.cos(phi_2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class LookO2SpatialIndex[T: LookO2Located]:
+
+    def __init__(
+            self: Self,
+            items: Sequence[T],
+            cell_size: float = GRID_CELL_SIZE,
+            latitudes: Sequence[float] | None = None,
+            longitudes: Sequence[float] | None = None,
+    ) -> None:
+        # Columnar items pass their coordinate columns, so no item has to be materialized to build the index.
+        self._items = items
+        self._latitudes = latitudes if latitudes is not None else [item.latitude for item in items]
+        self._longitudes = longitudes if longitudes is not None else [item.longitude for item in items]
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        for index, (latitude, longitude) in enumerate(zip(self._latitudes, self._longitudes)):
+            self._cells.setdefault(self._cell(latitude, longitude), []).append(index)
+        self._max_abs_latitude = max(map(abs, self._latitudes), default=0.0)
+        rows = [row for row, _ in self._cells]
+        columns = [column for _, column in self._cells]
+        self._bounds = (min(rows, default=0), max(rows, default=0), min(columns, default=0), max(columns, default=0))
+
+    def __len__(self: Self) -> int:
+        return len(self._items)
+
+    def _cell(self: Self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self._cell_size), math.floor(longitude / self._cell_size)
+
+    def _ring(self: Self, center: tuple[int, int], radius: int) -> Iterator[int]:
+        row, column = center
+        for cell_row in range(row - radius, row + radius + 1):
+            if abs(cell_row - row) == radius:
+                columns = range(column - radius, column + radius + 1)
+            else:
+                columns = (column - radius, column + radius)
+            for cell_column in columns:
+                yield from self._cells.get((cell_row, cell_column), ())
+
+    def _max_ring(self: Self, center: tuple[int, int]) -> int:
+        min_row, max_row, min_column, max_column = self._bounds
+        row, column = center
+        return max(abs(row - min_row), abs(row - max_row), abs(column - min_column), abs(column - max_column))
+
+    def _ring_distance(self: Self, latitude: float, radius: int) -> float:
+        extreme_latitude = min(max(abs(latitude), self._max_abs_latitude), 89.0)
+        return radius * self._cell_size * KM_PER_DEGREE * math.cos(math.radians(extreme_latitude))
+
+    def nearest(self: Self, latitude: float, longitude: float, count: int) -> list[tuple[float, T]]:
+        if count <= 0 or len(self._items) == 0:
+            return []
+        center = self._cell(latitude, longitude)
+        max_ring = self._max_ring(center)
+        best: list[tuple[float, int]] = []
+        for radius in range(max_ring + 1):
+            for index in self._ring(center, radius):
+                distance = haversine_distance(latitude, longitude, self._latitudes[index], self._longitudes[index])
+                if len(best) < count:
+                    heapq.heappush(best, (-distance, index))
+                elif -best[0][0] > distance:
+                    heapq.heapreplace(best, (-distance, index))
+            if len(best) >= count and -best[0][0] <= self._ring_distance(latitude, radius):
+                break
+        return [(-distance, self._items[index]) for distance, index in sorted(best, reverse=True)]
+
+    def within(self: Self, latitude: float, longitude: float, radius_km: float) -> list[tuple[float, T]]:
+        latitude_span = radius_km / KM_PER_DEGREE
+        cos_latitude = max(math.cos(math.radians(min(abs(latitude) + latitude_span, 89.0))), 1e-6)
+        longitude_span = latitude_span / cos_latitude
+        min_row, min_column = self._cell(latitude - latitude_span, longitude - longitude_span)
+        max_row, max_column = self._cell(latitude + latitude_span, longitude + longitude_span)
+
+        found: list[tuple[float, int]] = []
+        for row in range(min_row, max_row + 1):
+            for column in range(min_column, max_column + 1):
+                for index in self._cells.get((row, column), ()):
+                    distance = haversine_distance(latitude, longitude, self._latitudes[index], self._longitudes[index])
+                    if distance <= radius_km:
+                        found.append((distance, index))
+        return [(distance, self._items[index]) for distance, index in sorted(found)]
@@ -0,0 +1,95 @@
+import bisect
+from collections import Counter, deque
+from collections.abc import Sequence
+from typing import Any, Self
+
+from .const import ERROR_RATE_WINDOW, LATENCY_BUCKETS, PARSE_TIME_BUCKETS, PAYLOAD_SIZE_BUCKETS
+
+
+class LookO2Histogram:
+
+    def __init__(self: Self, bounds: Sequence[float]) -> None:
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum: float | None = None
+        self.last: float | None = None
+
+    def record(self: Self, value: float) -> None:
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.last = value
+
+    @property
+    def mean(self: Self) -> float | None:
+        return self.total / self.count if self.count > 0 else None
+
+    def as_dict(self: Self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.maximum,
+            "last": self.last,
+            "buckets": {
+                **{f"<={bound}": count for bound, count in zip(self._bounds, self._counts)},
+                f">{self._bounds[-1]}": self._counts[-1],
+            },
+        }
+
+
+class LookO2Metrics:
+
+    def __init__(self: Self) -> None:
+        self.latency: dict[str, LookO2Histogram] = {}
+        self.payload_size: dict[str, LookO2Histogram] = {}
+        self.parse_time: dict[str, LookO2Histogram] = {}
+        self.requests = 0
+        self.retries = 0
+        self.errors: Counter[str] = Counter()
+        self._outcomes: deque[bool] = deque(maxlen=ERROR_RATE_WINDOW)
+
+    def record_latency(self: Self, method: str, latency: float) -> None:
+        self._histogram(self.latency, method, LATENCY_BUCKETS).record(latency)
+
+    def record_payload(self: Self, method: str, size: int) -> None:
+        self._histogram(self.payload_size, method, PAYLOAD_SIZE_BUCKETS).record(size)
+
+    def record_parse(self: Self, method: str, duration: float) -> None:
+        self._histogram(self.parse_time, method, PARSE_TIME_BUCKETS).record(duration)
+
+    def record_success(self: Self) -> None:
+        self._outcomes.append(True)
+
+    def record_error(self: Self, err: Exception) -> None:
+        self.errors[type(err).__name__] += 1
+        self._outcomes.append(False)
+
+    @property
+    def error_rate(self: Self) -> float | None:
+        if len(self._outcomes) == 0:
+            return None
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    @staticmethod
+    def _histogram(
+            histograms: dict[str, LookO2Histogram],
+            method: str,
+            bounds: Sequence[float],
+    ) -> LookO2Histogram:
+        if method not in histograms:
+            histograms[method] = LookO2Histogram(bounds)
+        return histograms[method]
+
+    def as_dict(self: Self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "error_rate": self.error_rate,
+            "errors": dict(self.errors),
+            "latency": {method: histogram.as_dict() for method, histogram in self.latency.items()},
+            "payload_size": {method: histogram.as_dict() for method, histogram in self.payload_size.items()},
+            "parse_time": {method: histogram.as_dict() for method, histogram in self.parse_time.items()},
+        }
@@ -1,11 +1,20 @@
 import datetime
-from dataclasses import dataclass
-from typing import Self
+import sys
+from dataclasses import dataclass, field, fields
+from typing import Any, Final, Self
 
 type LookO2DevicesDataMap = dict[str, LookO2DeviceData]
 
+_INTERNED_FIELDS: Final = (
+    "aqi_string_pl",
+    "aqi_string_en",
+    "aqi_description_pl",
+    "aqi_description_en",
+    "color",
+)
 
-@dataclass
+
+@dataclass(slots=True)
 class LookO2DeviceData:
     device_id: str
     pm1: float
@@ -42,11 +51,11 @@ class LookO2DeviceData:
             latitude=float(data["Lat"]),
             longitude=float(data["Lon"]),
             aqi=int(data["IJP"]),
-            aqi_string_pl=data["IJPString"],
-            aqi_string_en=data["IJPStringEN"],
-            aqi_description_pl=data["IJPDescription"],
-            aqi_description_en=data["IJPDescriptionEN"],
-            color=data["Color"],
+            aqi_string_pl=sys.intern(data["IJPString"]),
+            aqi_string_en=sys.intern(data["IJPStringEN"]),
+            aqi_description_pl=sys.intern(data["IJPDescription"]),
+            aqi_description_en=sys.intern(data["IJPDescriptionEN"]),
+            color=sys.intern(data["Color"]),
             temperature=float(data["Temperature"]),
             humidity=float(data["Humidity"]),
             average_pm1=float(data["AveragePM1"]),
@@ -58,3 +67,58 @@ class LookO2DeviceData:
             hcho=float(data["HCHO"]),
             average_hcho=float(data["AverageHCHO"]),
         )
+
+    @classmethod
+    def from_compact(cls: type[Self], values: list[Any]) -> Self:
+        names = [f.name for f in fields(cls)]
+        if len(values) != len(names):
+            raise ValueError(f"Expected {len(names)} values, got {len(values)}")
+        data = dict(zip(names, values))
+        data["timestamp"] = datetime.datetime.fromtimestamp(data["timestamp"])
+        for name in _INTERNED_FIELDS:
+            data[name] = sys.intern(data[name])
+        return cls(**data)
+
+    def changed_fields(self: Self, previous: Self | None) -> set[str]:
+        if previous is None:
+            return {f.name for f in fields(self)}
+        return {f.name for f in fields(self) if getattr(self, f.name) != getattr(previous, f.name)}
+
+    def to_compact(self: Self) -> list[Any]:
+        values = [getattr(self, f.name) for f in fields(self)]
+        return [int(value.timestamp()) if isinstance(value, datetime.datetime) else value for value in values]
+
+
+@dataclass
+class LookO2DevicesFetchResult:
+    data: LookO2DevicesDataMap = field(default_factory=dict)
+    errors: dict[str, Exception] = field(default_factory=dict)
+    not_modified: set[str] = field(default_factory=set)
+
+    @property
+    def is_complete(self: Self) -> bool:
+        return len(self.errors) == 0
+
+
+@dataclass
+class LookO2CachedResponse[T]:
+    fingerprint: bytes
+    value: T
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def conditional_headers(self: Self) -> dict[str, str]:
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class LookO2RawResponse:
+    body: bytes
+    etag: str | None = None
+    last_modified: str | None = None
@@ -0,0 +1,40 @@
+import codecs
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+_WHITESPACE = " \t\n\r"
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[Any, str]]:
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+
+    async for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        position = 0
+        while True:
+            while position < len(buffer) and (buffer[position] in _WHITESPACE or (started and buffer[position] == ",")):
+                position += 1
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError(f"Expected JSON array, got {buffer[position]!r}")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield item, buffer[position:end]
+            position = end
+        buffer = buffer[position:]
+
+    buffer += text_decoder.decode(b"", final=True)
+    raise ValueError(f"Unexpected end of JSON array: {buffer[:100]!r}")
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from enum import StrEnum
+from typing import Any, Self
+
+from aiohttp import ClientError
+
+from .const import (
+    BUDGET_BUCKET_SECONDS,
+    BUDGET_LOW_WATERMARK,
+    BUDGET_MAX_STRETCH,
+    BUDGET_PACE_WINDOW,
+    BUDGET_RESERVE,
+    BUDGET_WINDOW,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_TIMEOUT,
+    MAX_RETRIES,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_PER_SECOND,
+    RESPONSE_MEMO_TTL,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    TRANSPORT_DECISIONS_HISTORY,
+)
+from .exceptions import LookO2ApiException, LookO2BudgetExhaustedException, LookO2CircuitOpenException
+from .model import LookO2CachedResponse
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LookO2CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class LookO2RateLimiter:
+
+    def __init__(self: Self, rate: float = RATE_LIMIT_PER_SECOND, capacity: int = RATE_LIMIT_BURST) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def tokens(self: Self) -> float:
+        return min(self._capacity, self._tokens + (time.monotonic() - self._updated_at) * self._rate)
+
+    async def acquire(self: Self) -> float:
+        async with self._lock:
+            self._tokens = self.tokens
+            self._updated_at = time.monotonic()
+            delay = 0.0
+            if self._tokens < 1:
+                delay = (1 - self._tokens) / self._rate
+                await asyncio.sleep(delay)
+                self._tokens = self.tokens
+                self._updated_at = time.monotonic()
+            self._tokens -= 1
+            return delay
+
+
+class LookO2CircuitBreaker:
+
+    def __init__(
+            self: Self,
+            failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout: float = CIRCUIT_BREAKER_RESET_TIMEOUT,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self: Self) -> LookO2CircuitState:
+        if self._opened_at is None:
+            return LookO2CircuitState.CLOSED
+        if time.monotonic() - self._opened_at >= self._reset_timeout:
+            return LookO2CircuitState.HALF_OPEN
+        return LookO2CircuitState.OPEN
+
+    def before_request(self: Self) -> None:
+        if self.state == LookO2CircuitState.OPEN:
+            raise LookO2CircuitOpenException(self._opened_at + self._reset_timeout - time.monotonic())
+
+    def record_success(self: Self) -> None:
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self: Self) -> bool:
+        self.failures += 1
+        if self.state == LookO2CircuitState.HALF_OPEN or self.failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+
+class LookO2RequestBudget:
+
+    def __init__(self: Self) -> None:
+        self._limits: dict[str, int] = {}
+        # Requests per minute as [bucket start, count], on the wall clock so they can be persisted across restarts.
+        self._buckets: deque[list[int]] = deque()
+
+    @property
+    def daily_limit(self: Self) -> int | None:
+        return min(self._limits.values(), default=None)
+
+    def set_limit(self: Self, owner: str, limit: int | None) -> None:
+        if limit is None:
+            self._limits.pop(owner, None)
+        else:
+            self._limits[owner] = limit
+
+    def record(self: Self, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        start = int(now // BUDGET_BUCKET_SECONDS * BUDGET_BUCKET_SECONDS)
+        if len(self._buckets) > 0 and self._buckets[-1][0] == start:
+            self._buckets[-1][1] += 1
+        else:
+            self._buckets.append([start, 1])
+        self._expire(now)
+
+    def _expire(self: Self, now: float) -> None:
+        while len(self._buckets) > 0 and self._buckets[0][0] <= now - BUDGET_WINDOW:
+            self._buckets.popleft()
+
+    def used(self: Self, window: float = BUDGET_WINDOW, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        return sum(count for start, count in self._buckets if start > now - window)
+
+    def remaining(self: Self, now: float | None = None) -> int | None:
+        limit = self.daily_limit
+        return None if limit is None else max(limit - self.used(now=now), 0)
+
+    def allowance(self: Self, now: float | None = None) -> int | None:
+        """Return how many requests refreshes may still spend, keeping a reserve for flows and reloads."""
+        remaining = self.remaining(now)
+        if remaining is None:
+            return None
+        return max(remaining - math.ceil(self.daily_limit * BUDGET_RESERVE), 0)
+
+    def interval_factor(self: Self, now: float | None = None) -> float:
+        """Return how much polling intervals should be stretched to stay within the daily limit."""
+        limit = self.daily_limit
+        if limit is None:
+            return 1.0
+        remaining = self.remaining(now)
+        factor = 1.0
+        if remaining < limit * BUDGET_LOW_WATERMARK:
+            factor = limit * BUDGET_LOW_WATERMARK / max(remaining, 1)
+        # Keeping the pace of the last hour for a whole day must not exceed the limit either.
+        projected = self.used(BUDGET_PACE_WINDOW, now) * BUDGET_WINDOW / BUDGET_PACE_WINDOW
+        return min(max(factor, projected / limit), BUDGET_MAX_STRETCH)
+
+    def before_request(self: Self) -> None:
+        now = time.time()
+        if self.remaining(now) == 0:
+            self._expire(now)
+            retry_after = self._buckets[0][0] + BUDGET_WINDOW - now if len(self._buckets) > 0 else 0.0
+            raise LookO2BudgetExhaustedException(retry_after)
+
+    def to_compact(self: Self) -> list[list[int]]:
+        return [list(bucket) for bucket in self._buckets]
+
+    def merge(self: Self, buckets: list[list[int]]) -> None:
+        # Entries sharing a token persist the same buckets, so the larger count of a minute wins.
+        merged = {start: count for start, count in self._buckets}
+        for start, count in buckets:
+            merged[int(start)] = max(merged.get(int(start), 0), int(count))
+        self._buckets = deque([start, count] for start, count in sorted(merged.items()))
+        self._expire(time.time())
+
+    def as_dict(self: Self) -> dict[str, Any]:
+        return {
+            "daily_limit": self.daily_limit,
+            "used_last_hour": self.used(BUDGET_PACE_WINDOW),
+            "used_last_day": self.used(),
+            "remaining": self.remaining(),
+            "interval_factor": self.interval_factor(),
+        }
+
+
+class LookO2Transport:
+
+    def __init__(
+            self: Self,
+            max_retries: int = MAX_RETRIES,
+            backoff_base: float = RETRY_BACKOFF_BASE,
+            backoff_max: float = RETRY_BACKOFF_MAX,
+            rate_limiter: LookO2RateLimiter | None = None,
+    ) -> None:
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self.rate_limiter = rate_limiter or LookO2RateLimiter()
+        self.circuit_breaker = LookO2CircuitBreaker()
+        self.budget = LookO2RequestBudget()
+        self.retries = 0
+        self.rejections = 0
+        self.rate_limited_seconds = 0.0
+        self.decisions: deque[dict[str, Any]] = deque(maxlen=TRANSPORT_DECISIONS_HISTORY)
+        self.coalesced = 0
+        self.memo_hits = 0
+        self._in_flight: dict[str, asyncio.Task[Any]] = {}
+        self._memo: dict[str, tuple[float, Any]] = {}
+        self.responses: dict[str, LookO2CachedResponse[Any]] = {}
+        self.not_modified = 0
+
+    async def coalesce[T](self: Self, key: str, operation: Callable[[], Awaitable[T]]) -> T:
+        memo = self._memo.get(key)
+        if memo is not None and time.monotonic() - memo[0] < RESPONSE_MEMO_TTL:
+            self.memo_hits += 1
+            return memo[1]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_and_memoize(key, operation))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _run_and_memoize[T](self: Self, key: str, operation: Callable[[], Awaitable[T]]) -> T:
+        result = await operation()
+        now = time.monotonic()
+        self._memo = {
+            memo_key: memo for memo_key, memo in self._memo.items() if now - memo[0] < RESPONSE_MEMO_TTL
+        }
+        self._memo[key] = (now, result)
+        return result
+
+    async def execute[T](self: Self, operation: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            try:
+                self.circuit_breaker.before_request()
+            except LookO2CircuitOpenException as err:
+                self.rejections += 1
+                self._record_decision("rejected", attempt, err)
+                raise
+            try:
+                self.budget.before_request()
+            except LookO2BudgetExhaustedException as err:
+                self.rejections += 1
+                self._record_decision("budget_exhausted", attempt, err)
+                raise
+
+            delay = await self.rate_limiter.acquire()
+            if delay > 0:
+                self.rate_limited_seconds += delay
+                self._record_decision("rate_limited", attempt, delay=delay)
+
+            self.budget.record()
+            try:
+                result = await operation()
+            except (ClientError, TimeoutError, LookO2ApiException) as err:
+                if not self._is_retryable(err):
+                    raise
+                if self.circuit_breaker.record_failure():
+                    self._record_decision("circuit_opened", attempt, err)
+                if attempt >= self._max_retries or self.circuit_breaker.state == LookO2CircuitState.OPEN:
+                    self._record_decision("gave_up", attempt, err)
+                    raise
+                delay = random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** attempt))
+                self.retries += 1
+                self._record_decision("retry", attempt, err, delay)
+                _LOGGER.debug("Request failed (%s), retrying in %.1fs", err, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                self.circuit_breaker.record_success()
+                return result
+
+    @staticmethod
+    def _is_retryable(err: Exception) -> bool:
+        if isinstance(err, LookO2ApiException):
+            return err.status_code == 429 or err.status_code >= 500
+        return True
+
+    def _record_decision(
+            self: Self,
+            decision: str,
+            attempt: int,
+            err: Exception | None = None,
+            delay: float | None = None,
+    ) -> None:
+        self.decisions.append({
+            "time": time.time(),
+            "decision": decision,
+            "attempt": attempt,
+            "error": None if err is None else repr(err),
+            "delay": delay,
+        })
+
+    def as_dict(self: Self) -> dict[str, Any]:
+        return {
+            "circuit_state": self.circuit_breaker.state,
+            "consecutive_failures": self.circuit_breaker.failures,
+            "retries": self.retries,
+            "rejections": self.rejections,
+            "rate_limited_seconds": self.rate_limited_seconds,
+            "rate_limiter_tokens": self.rate_limiter.tokens,
+            "coalesced": self.coalesced,
+            "memo_hits": self.memo_hits,
+            "in_flight": len(self._in_flight),
+            "not_modified": self.not_modified,
+            "budget": self.budget.as_dict(),
+            "decisions": list(self.decisions),
+        }
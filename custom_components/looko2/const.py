@@ -10,7 +10,45 @@ DOMAIN: Final = "looko2"
 ATTRIBUTION: Final = "Data provided by LookO2"
 
 CONF_DEVICE_IDS: Final = "device_ids"
+CONF_REGION: Final = "region"
+CONF_LONG_TERM_STATISTICS: Final = "long_term_statistics"
+CONF_PUSH: Final = "push"
+CONF_DAILY_REQUEST_BUDGET: Final = "daily_request_budget"
 
 UPDATE_INTERVAL: Final = timedelta(minutes=30)
+MIN_POLL_INTERVAL: Final = timedelta(minutes=2)
+MAX_POLL_INTERVAL: Final = timedelta(hours=1)
+POLL_DELAY: Final = timedelta(seconds=30)
+CADENCE_SMOOTHING: Final = 0.3
+PUSH_FALLBACK_INTERVAL: Final = timedelta(hours=1)
+PUSH_MAX_CLOCK_SKEW: Final = timedelta(minutes=5)
+REFRESH_DEBOUNCE_COOLDOWN: Final = 2.0
+REFRESH_MIN_INTERVAL: Final = timedelta(minutes=2)
+
+REFRESH_DURATION_BUCKETS: Final = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SNAPSHOT_STORAGE_VERSION: Final = 1
+SNAPSHOT_SAVE_DELAY: Final = 60
+
+ATTR_STALE: Final = "stale"
+
+SERVICE_REFRESH: Final = "refresh"
+
+HISTORY_STORAGE_VERSION: Final = 1
+HISTORY_SAVE_DELAY: Final = 300
+HISTORY_CAPACITY: Final = 1440
+HISTORY_METRICS: Final = ("pm25", "pm10")
+
+STATISTICS_STORAGE_VERSION: Final = 1
+STATISTICS_SAVE_DELAY: Final = 300
+
+BUDGET_STORAGE_VERSION: Final = 1
+BUDGET_SAVE_DELAY: Final = 60
+
+CATALOG_TTL: Final = timedelta(hours=1)
+
+REGION_DEFAULT_RADIUS: Final = 10000
+REGION_METRICS: Final = ("pm25", "pm10")
+ATTR_STATION_NAME: Final = "station_name"
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
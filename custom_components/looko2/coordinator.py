@@ -1,40 +1,437 @@
+from __future__ import annotations
+
+import asyncio
 import logging
-from typing import Self
+import time
+from dataclasses import dataclass, fields
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Self
 
-from homeassistant.core import HomeAssistant
+from aiohttp import ClientError
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE, CONF_RADIUS
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .connector import LookO2Connector, LookO2DevicesDataMap
-from .connector.exceptions import LookO2Exception
-from .const import DOMAIN, UPDATE_INTERVAL
+from .connector.exceptions import LookO2Exception, LookO2RequestRefusedException
+from .connector.metrics import LookO2Histogram
+from .connector.model import LookO2DeviceData, LookO2DevicesFetchResult
+from .const import (
+    BUDGET_SAVE_DELAY,
+    BUDGET_STORAGE_VERSION,
+    CONF_LONG_TERM_STATISTICS,
+    CONF_PUSH,
+    CONF_REGION,
+    DOMAIN,
+    HISTORY_SAVE_DELAY,
+    HISTORY_STORAGE_VERSION,
+    PUSH_MAX_CLOCK_SKEW,
+    REFRESH_DEBOUNCE_COOLDOWN,
+    REFRESH_DURATION_BUCKETS,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+    STATISTICS_SAVE_DELAY,
+    STATISTICS_STORAGE_VERSION,
+    UPDATE_INTERVAL,
+)
+from .history import LookO2History
+from .long_term_statistics import LookO2LongTermStatistics
+from .pool import async_get_device_pool
+from .region import LookO2RegionAggregate
+from .scheduler import LookO2PollingScheduler
+
+if TYPE_CHECKING:
+    from .config_flow import LookO2ConfigEntry
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+
+
+def history_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    return Store(hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.history")
+
+
+def long_term_statistics_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    return Store(hass, STATISTICS_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.statistics")
+
+
+def budget_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    return Store(hass, BUDGET_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.budget")
+
+
+def create_hub_device_info(config_entry: LookO2ConfigEntry) -> DeviceInfo:
+    return DeviceInfo(
+        entry_type=DeviceEntryType.SERVICE,
+        identifiers={(DOMAIN, config_entry.entry_id)},
+        manufacturer="LookO2",
+        name=config_entry.title,
+    )
+
+
+@dataclass
+class LookO2DiffStats:
+    devices_compared: int = 0
+    devices_changed: int = 0
+    fields_compared: int = 0
+    fields_changed: int = 0
+    writes_skipped: int = 0
+
+
 class LookO2DataUpdateCoordinator(DataUpdateCoordinator[LookO2DevicesDataMap]):
 
     def __init__(
             self: Self,
             hass: HomeAssistant,
+            config_entry: LookO2ConfigEntry,
             look_o2_connector: LookO2Connector,
-            devices: LookO2DevicesDataMap,
     ) -> None:
         self.look_o2_connector = look_o2_connector
-        self.device_infos = {
-            device.device_id: DeviceInfo(
-                entry_type=DeviceEntryType.SERVICE,
-                identifiers={(DOMAIN, device.device_id)},
-                manufacturer="LookO2",
-                name=f"{device.name}",
-                configuration_url=f"https://looko2.com/tracker.php?lan=&search={device.device_id}",
-                serial_number=device.device_id
-            ) for device in devices.values()
-        }
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=UPDATE_INTERVAL, update_method=self.update_data)
+        self.device_infos: dict[str, DeviceInfo] = {}
+        self.stale_device_ids: set[str] = set()
+        self.scheduler = LookO2PollingScheduler()
+        self.updated_device_ids: set[str] = set()
+        self.changed_fields: dict[str, set[str]] = {}
+        self.diff_stats = LookO2DiffStats()
+        self.refresh_duration = LookO2Histogram(REFRESH_DURATION_BUCKETS)
+        self.hub_device_info = create_hub_device_info(config_entry)
+        self.history = LookO2History()
+        self.push_enabled: bool = config_entry.options.get(CONF_PUSH, False)
+        self.pushed_readings = 0
+        self.long_term_statistics = (
+            LookO2LongTermStatistics(hass) if config_entry.options.get(CONF_LONG_TERM_STATISTICS, False) else None
+        )
+        self._store = snapshot_store(hass, config_entry.entry_id)
+        self._history_store = history_store(hass, config_entry.entry_id)
+        self._statistics_store = long_term_statistics_store(hass, config_entry.entry_id)
+        self._budget_store = budget_store(hass, config_entry.entry_id)
+        self._pool = async_get_device_pool(hass)
+        self._requested_device_ids: set[str] = set()
+        self._requested_refresh: asyncio.Future[None] | None = None
+        self._requested_refresh_debouncer = Debouncer(
+            hass, _LOGGER, cooldown=REFRESH_DEBOUNCE_COOLDOWN, immediate=False, function=self._refresh_requested
+        )
+        super().__init__(hass, _LOGGER, config_entry=config_entry, name=DOMAIN, update_interval=UPDATE_INTERVAL,
+                         update_method=self.update_data)
+
+    async def async_restore_history(self: Self) -> None:
+        stored = await self._history_store.async_load()
+        if stored is None:
+            return
+
+        try:
+            self.history = LookO2History.from_compact(stored["devices"], self.look_o2_connector.device_ids or [])
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid history: %s", err)
+
+    async def async_restore_long_term_statistics(self: Self) -> None:
+        if self.long_term_statistics is None:
+            return
+        stored = await self._statistics_store.async_load()
+        if stored is None:
+            return
+
+        try:
+            self.long_term_statistics = LookO2LongTermStatistics.from_compact(
+                self.hass, stored, self.look_o2_connector.device_ids or []
+            )
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid long-term statistics state: %s", err)
+
+    async def async_restore_budget(self: Self) -> None:
+        stored = await self._budget_store.async_load()
+        if stored is None:
+            return
+
+        try:
+            self.look_o2_connector.transport.budget.merge(stored["buckets"])
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid request budget: %s", err)
+
+    async def async_restore_snapshot(self: Self) -> bool:
+        snapshot = await self._store.async_load()
+        if snapshot is None:
+            return False
+
+        try:
+            devices = [LookO2DeviceData.from_compact(values) for values in snapshot["devices"]]
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid snapshot: %s", err)
+            return False
+
+        restored = {device.device_id: device for device in devices}
+        device_ids = self.look_o2_connector.device_ids or []
+        if any(device_id not in restored for device_id in device_ids):
+            return False
+
+        for device_id in device_ids:
+            self.device_infos[device_id] = self._create_device_info(restored[device_id])
+        self.data = {device_id: restored[device_id] for device_id in device_ids}
+        self.stale_device_ids = set(device_ids)
+        return True
 
     async def update_data(self: Self) -> LookO2DevicesDataMap:
+        device_ids = self.look_o2_connector.device_ids or []
+        now = time.time()
+        due_device_ids = self.scheduler.devices_due(device_ids, now)
+        budget = self.look_o2_connector.transport.budget
+        if self.data is not None and budget.daily_limit is not None:
+            due_device_ids = self._select_within_budget(due_device_ids, budget.allowance(now), now)
+        if self.data is not None and len(due_device_ids) == 0:
+            self.updated_device_ids = self.history.expire(now)
+            self.update_interval = self._next_interval(device_ids, now)
+            return self.data
+
+        start = time.monotonic()
         try:
-            return await self.look_o2_connector.get_all_device_data()
+            return await self._update_devices(device_ids, due_device_ids)
+        finally:
+            self.refresh_duration.record(time.monotonic() - start)
+            self._save_budget()
+
+    def _save_budget(self: Self) -> None:
+        budget = self.look_o2_connector.transport.budget
+        if budget.daily_limit is not None:
+            self._budget_store.async_delay_save(lambda: {"buckets": budget.to_compact()}, BUDGET_SAVE_DELAY)
+
+    def _select_within_budget(self: Self, device_ids: list[str], allowance: int, now: float) -> list[str]:
+        """Keep the due devices the budget allows, preferring ones with enabled entities and then the most overdue."""
+        if self.look_o2_connector.estimate_requests(len(device_ids)) <= allowance:
+            return device_ids
+        active = set(self.async_contexts())
+        ranked = sorted(
+            device_ids,
+            key=lambda device_id: (device_id in active, now - self.scheduler.get_schedule(device_id).next_fetch),
+            reverse=True,
+        )
+        _LOGGER.debug("Request budget allows %s of %s due devices", allowance, len(device_ids))
+        return ranked[:allowance]
+
+    async def _update_devices(self: Self, device_ids: list[str], due_device_ids: list[str]) -> LookO2DevicesDataMap:
+        try:
+            result = await self._pool.async_fetch(self, due_device_ids)
+        except LookO2RequestRefusedException as err:
+            if self.data is None:
+                raise UpdateFailed(err) from err
+            # Nothing was requested, so the last data stays available until the devices may be fetched again.
+            result = LookO2DevicesFetchResult(errors=dict.fromkeys(due_device_ids, err))
         except LookO2Exception as err:
             raise UpdateFailed(err) from err
+
+        if self.data is None and not result.is_complete:
+            err = next(iter(result.errors.values()))
+            raise UpdateFailed(err) from err
+
+        return self._merge_result(device_ids, result)
+
+    async def async_request_device_refresh(self: Self, device_ids: set[str]) -> None:
+        """Queue devices for the next debounced refresh and wait until it has finished."""
+        self._requested_device_ids |= device_ids
+        if self._requested_refresh is None:
+            self._requested_refresh = self.hass.loop.create_future()
+            # All callers may have been cancelled by the time it fails, so its exception is retrieved here.
+            self._requested_refresh.add_done_callback(lambda future: future.exception())
+        requested_refresh = self._requested_refresh
+        await self._requested_refresh_debouncer.async_call()
+        # The future is shared by all callers, so one of them being cancelled must not cancel it for the others.
+        await asyncio.shield(requested_refresh)
+
+    async def _refresh_requested(self: Self) -> None:
+        # The debouncer drops calls made while it runs, so devices requested meanwhile are picked up here.
+        while len(self._requested_device_ids) > 0:
+            requested_device_ids, self._requested_device_ids = self._requested_device_ids, set()
+            requested_refresh, self._requested_refresh = self._requested_refresh, None
+            try:
+                await self._refresh_devices(requested_device_ids)
+            except Exception as err:  # pylint: disable=broad-except
+                requested_refresh.set_exception(err)
+            finally:
+                if not requested_refresh.done():
+                    requested_refresh.set_result(None)
+
+    async def _refresh_devices(self: Self, requested_device_ids: set[str]) -> None:
+        device_ids = self.look_o2_connector.device_ids or []
+        now = time.time()
+        # A device reports on its own cadence, so fetching it again before that passed cannot return anything new.
+        due_device_ids = [
+            device_id for device_id in device_ids
+            if device_id in requested_device_ids and not self.scheduler.is_fresh(device_id, now)
+        ]
+        _LOGGER.debug("Refreshing %s of %s requested devices", len(due_device_ids), len(requested_device_ids))
+        if len(due_device_ids) == 0:
+            return
+
+        try:
+            result = await self._pool.async_fetch(self, due_device_ids)
+        except (LookO2Exception, ValueError) as err:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="refresh_failed",
+                translation_placeholders={"error": str(err)},
+            ) from err
+        finally:
+            self._save_budget()
+        self._async_set_data(self._merge_result(device_ids, result))
+
+    async def async_shutdown(self: Self) -> None:
+        await super().async_shutdown()
+        self._requested_refresh_debouncer.async_shutdown()
+        # Callers still waiting for a refresh that will never run are released rather than left hanging.
+        if self._requested_refresh is not None and not self._requested_refresh.done():
+            self._requested_refresh.set_result(None)
+
+    @callback
+    def async_apply_devices(self: Self, devices: LookO2DevicesDataMap) -> None:
+        device_ids = self.look_o2_connector.device_ids or []
+        self._async_set_data(self._merge_result(device_ids, LookO2DevicesFetchResult(data=devices)))
+
+    @callback
+    def _async_set_data(self: Self, data: LookO2DevicesDataMap) -> None:
+        # Unlike async_set_updated_data this keeps the scheduled poll, so devices not updated here still get polled.
+        self.data = data
+        self.async_update_listeners()
+
+    @callback
+    def async_push_devices(self: Self, devices: list[LookO2DeviceData]) -> int:
+        """Merge pushed readings of tracked devices that are newer than the current data."""
+        device_ids = self.look_o2_connector.device_ids or []
+        previous = self.data or {}
+        # A reading dated in the future would hold back polling of its device until that time.
+        latest = time.time() + PUSH_MAX_CLOCK_SKEW.total_seconds()
+        accepted = {
+            device.device_id: device
+            for device in devices
+            if device.device_id in device_ids
+            and device.timestamp.timestamp() <= latest
+            and (device.device_id not in previous or device.timestamp > previous[device.device_id].timestamp)
+        }
+        if len(accepted) > 0:
+            self.pushed_readings += len(accepted)
+            self._async_set_data(self._merge_result(device_ids, LookO2DevicesFetchResult(data=accepted), pushed=True))
+        return len(accepted)
+
+    def _next_interval(self: Self, device_ids: list[str], now: float) -> timedelta:
+        budget = self.look_o2_connector.transport.budget
+        return self.scheduler.next_interval(device_ids, now) * budget.interval_factor(now)
+
+    def _merge_result(
+            self: Self,
+            device_ids: list[str],
+            result: LookO2DevicesFetchResult,
+            pushed: bool = False,
+    ) -> LookO2DevicesDataMap:
+        now = time.time()
+        for device_id, err in result.errors.items():
+            if isinstance(err, LookO2RequestRefusedException):
+                _LOGGER.debug("Not fetching device %s: %s", device_id, err)
+                self.scheduler.defer(device_id, now + err.retry_after)
+            else:
+                _LOGGER.warning("Failed to update data of device %s: %s", device_id, err)
+                self.scheduler.record_failure(device_id, now)
+
+        for device in result.data.values():
+            if pushed:
+                self.scheduler.record_push(device, now)
+            else:
+                self.scheduler.record(device, now)
+            if device.device_id not in self.device_infos:
+                self.device_infos[device.device_id] = self._create_device_info(device)
+        self.update_interval = self._next_interval(device_ids, now)
+
+        previous = self.data or {}
+        self.changed_fields = {
+            device_id: set() if device_id in result.not_modified and device_id in previous
+            else device.changed_fields(previous.get(device_id))
+            for device_id, device in result.data.items()
+        }
+        self._update_diff_stats()
+
+        data = {**previous, **result.data}
+        self.updated_device_ids = {
+            device_id for device_id, changed in self.changed_fields.items() if len(changed) > 0
+        } | (self.stale_device_ids & set(result.data))
+        self.stale_device_ids -= self.updated_device_ids
+        if len(self.updated_device_ids) > 0:
+            self._store.async_delay_save(lambda: self._create_snapshot(data), SNAPSHOT_SAVE_DELAY)
+
+        history_changed = False
+        for device_id in self.updated_device_ids:
+            history_changed |= self.history.add(data[device_id])
+        if history_changed:
+            self._history_store.async_delay_save(
+                lambda: {"devices": self.history.to_compact()}, HISTORY_SAVE_DELAY
+            )
+
+        if self.long_term_statistics is not None:
+            statistics = self.long_term_statistics
+            added = [device_id for device_id in self.updated_device_ids if statistics.add(data[device_id])]
+            if len(added) > 0:
+                statistics.async_import()
+                self._statistics_store.async_delay_save(statistics.to_compact, STATISTICS_SAVE_DELAY)
+
+        self.updated_device_ids |= self.history.expire(now)
+        return data
+
+    def _update_diff_stats(self: Self) -> None:
+        self.diff_stats.devices_compared += len(self.changed_fields)
+        self.diff_stats.fields_compared += len(self.changed_fields) * len(fields(LookO2DeviceData))
+        for changed in self.changed_fields.values():
+            if len(changed) > 0:
+                self.diff_stats.devices_changed += 1
+                self.diff_stats.fields_changed += len(changed)
+
+    def is_device_available(self: Self, device_id: str) -> bool:
+        return device_id in (self.data or {}) and self.scheduler.is_available(device_id)
+
+    @staticmethod
+    def _create_snapshot(data: LookO2DevicesDataMap) -> dict[str, Any]:
+        return {"devices": [device.to_compact() for device in data.values()]}
+
+    @staticmethod
+    def _create_device_info(device: LookO2DeviceData) -> DeviceInfo:
+        return DeviceInfo(
+            entry_type=DeviceEntryType.SERVICE,
+            identifiers={(DOMAIN, device.device_id)},
+            manufacturer="LookO2",
+            name=f"{device.name}",
+            configuration_url=f"https://looko2.com/tracker.php?lan=&search={device.device_id}",
+            serial_number=device.device_id
+        )
+
+
+class LookO2RegionCoordinator(DataUpdateCoordinator[LookO2RegionAggregate]):
+
+    def __init__(
+            self: Self,
+            hass: HomeAssistant,
+            config_entry: LookO2ConfigEntry,
+            look_o2_connector: LookO2Connector,
+    ) -> None:
+        region = config_entry.options[CONF_REGION]
+        self.look_o2_connector = look_o2_connector
+        self.aggregate = LookO2RegionAggregate(
+            region[CONF_LATITUDE], region[CONF_LONGITUDE], region[CONF_RADIUS] / 1000
+        )
+        self.updated_device_ids: set[str] = set()
+        self.refresh_duration = LookO2Histogram(REFRESH_DURATION_BUCKETS)
+        self.hub_device_info = create_hub_device_info(config_entry)
+        super().__init__(hass, _LOGGER, config_entry=config_entry, name=DOMAIN, update_interval=UPDATE_INTERVAL,
+                         update_method=self.update_data)
+
+    async def update_data(self: Self) -> LookO2RegionAggregate:
+        start = time.monotonic()
+        try:
+            table = await self.look_o2_connector.get_device_table()
+        except (ClientError, TimeoutError, LookO2Exception, ValueError) as err:
+            raise UpdateFailed(err) from err
+        finally:
+            self.refresh_duration.record(time.monotonic() - start)
+
+        self.updated_device_ids = self.aggregate.update(table)
+        return self.aggregate
@@ -3,9 +3,15 @@ from __future__ import annotations
 from dataclasses import asdict
 from typing import Any
 
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_API_TOKEN, CONF_WEBHOOK_ID
 from homeassistant.core import HomeAssistant
 
 from . import LookO2ConfigEntry
+from .coordinator import LookO2RegionCoordinator
+from .pool import async_get_device_pool
+
+TO_REDACT = {CONF_API_TOKEN, CONF_WEBHOOK_ID}
 
 
 async def async_get_config_entry_diagnostics(
@@ -14,7 +20,23 @@ async def async_get_config_entry_diagnostics(
     """Return diagnostics for a config entry."""
     coordinator = entry.runtime_data.coordinator
 
+    diagnostics = {
+        "config_entry_data": async_redact_data(entry.as_dict(), TO_REDACT),
+        "transport": coordinator.look_o2_connector.transport.as_dict(),
+        "metrics": {
+            **coordinator.look_o2_connector.metrics.as_dict(),
+            "refresh_duration": coordinator.refresh_duration.as_dict(),
+        },
+    }
+    if isinstance(coordinator, LookO2RegionCoordinator):
+        return {**diagnostics, "region": coordinator.data.as_dict()}
     return {
-        "config_entry_data": entry.as_dict(),
+        **diagnostics,
         "device_data": {device_id: asdict(data) for device_id, data in coordinator.data.items()},
+        "diff_stats": asdict(coordinator.diff_stats),
+        "pool": async_get_device_pool(hass).as_dict(),
+        "push": {"enabled": coordinator.push_enabled, "accepted": coordinator.pushed_readings},
+        "long_term_statistics": (
+            None if coordinator.long_term_statistics is None else coordinator.long_term_statistics.as_dict()
+        ),
     }
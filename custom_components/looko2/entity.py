@@ -1,6 +1,9 @@
+from typing import Any
+
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import ATTRIBUTION
+from .const import ATTR_STALE, ATTRIBUTION
 from .coordinator import LookO2DataUpdateCoordinator
 
 
@@ -14,6 +17,42 @@ class LookO2Entity(CoordinatorEntity[LookO2DataUpdateCoordinator]):
             coordinator: LookO2DataUpdateCoordinator,
     ) -> None:
         """Initialize."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=device_id)
         self._device_id = device_id
         self._attr_device_info = coordinator.device_infos[device_id]
+        self._last_available: bool | None = None
+        self._last_state: Any = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._last_available = self.available
+        self._last_state = self._get_state_fingerprint() if self._last_available else None
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.is_device_available(self._device_id)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        available = self.available
+        if available == self._last_available and self._device_id not in self.coordinator.updated_device_ids:
+            return
+        state = self._get_state_fingerprint() if available else None
+        if available == self._last_available and state == self._last_state:
+            self.coordinator.diff_stats.writes_skipped += 1
+            return
+        self._last_available = available
+        self._last_state = state
+        super()._handle_coordinator_update()
+
+    def _create_unique_id(self, key: str) -> str:
+        return f"looko2_sensor_{self.coordinator.config_entry.entry_id}_{self._device_id}_{key}"
+
+    def _get_state_fingerprint(self) -> Any:
+        return self.state, self.extra_state_attributes
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        if self._device_id in self.coordinator.stale_device_ids:
+            return {ATTR_STALE: True}
+        return None
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import base64
+from array import array
+from collections import deque
+from datetime import timedelta
+from typing import Any, Final, Self
+
+from .connector.model import LookO2DeviceData
+from .const import HISTORY_CAPACITY, HISTORY_METRICS
+
+SECONDS_PER_HOUR: Final = 3600
+
+
+class LookO2RingBuffer:
+
+    def __init__(self: Self, capacity: int = HISTORY_CAPACITY) -> None:
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.end = 0
+
+    def __len__(self: Self) -> int:
+        return self.end - self.start
+
+    def append(self: Self, timestamp: float, value: float) -> int:
+        if len(self) == self.capacity:
+            self.start += 1
+        position = self.end % self.capacity
+        self._timestamps[position] = timestamp
+        self._values[position] = value
+        self.end += 1
+        return self.end - 1
+
+    def timestamp(self: Self, sequence: int) -> float:
+        return self._timestamps[sequence % self.capacity]
+
+    def value(self: Self, sequence: int) -> float:
+        return self._values[sequence % self.capacity]
+
+    def samples(self: Self) -> tuple[array, array]:
+        timestamps = array("d", (self.timestamp(sequence) for sequence in range(self.start, self.end)))
+        values = array("d", (self.value(sequence) for sequence in range(self.start, self.end)))
+        return timestamps, values
+
+
+class LookO2RollingWindow:
+
+    def __init__(self: Self, buffer: LookO2RingBuffer, duration: timedelta) -> None:
+        self._buffer = buffer
+        self._duration = duration.total_seconds()
+        self._start = buffer.end
+        self._origin = 0.0
+        self._count = 0
+        self._sum_t = 0.0
+        self._sum_v = 0.0
+        self._sum_tt = 0.0
+        self._sum_tv = 0.0
+        self._min: deque[int] = deque()
+        self._max: deque[int] = deque()
+
+    def push(self: Self, sequence: int) -> None:
+        timestamp = self._buffer.timestamp(sequence)
+        value = self._buffer.value(sequence)
+        if self._count == 0:
+            self._origin = timestamp
+
+        while len(self._min) > 0 and self._buffer.value(self._min[-1]) >= value:
+            self._min.pop()
+        self._min.append(sequence)
+        while len(self._max) > 0 and self._buffer.value(self._max[-1]) <= value:
+            self._max.pop()
+        self._max.append(sequence)
+        self._add(sequence, 1)
+
+        while self._start < sequence and self._buffer.timestamp(self._start) <= timestamp - self._duration:
+            self.evict()
+
+        if timestamp - self._origin > 2 * self._duration:
+            self._rebase()
+
+    def expire(self: Self, now: float) -> bool:
+        """Evict samples older than the window by the clock, so a silent station stops reporting stale values."""
+        expired = False
+        while self._start < self._buffer.end and self._buffer.timestamp(self._start) <= now - self._duration:
+            self.evict()
+            expired = True
+        return expired
+
+    def evict(self: Self) -> None:
+        self._add(self._start, -1)
+        if len(self._min) > 0 and self._min[0] == self._start:
+            self._min.popleft()
+        if len(self._max) > 0 and self._max[0] == self._start:
+            self._max.popleft()
+        self._start += 1
+
+    def _add(self: Self, sequence: int, sign: int) -> None:
+        hours = (self._buffer.timestamp(sequence) - self._origin) / SECONDS_PER_HOUR
+        value = self._buffer.value(sequence)
+        self._count += sign
+        self._sum_t += sign * hours
+        self._sum_v += sign * value
+        self._sum_tt += sign * hours * hours
+        self._sum_tv += sign * hours * value
+
+    def _rebase(self: Self) -> None:
+        # Moving the origin keeps the slope numerically stable; it runs once per two window durations.
+        self._origin = self._buffer.timestamp(self._start)
+        self._count = 0
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = 0.0
+        for sequence in range(self._start, self._buffer.end):
+            self._add(sequence, 1)
+
+    @property
+    def start(self: Self) -> int:
+        return self._start
+
+    @property
+    def minimum(self: Self) -> float | None:
+        return self._buffer.value(self._min[0]) if len(self._min) > 0 else None
+
+    @property
+    def maximum(self: Self) -> float | None:
+        return self._buffer.value(self._max[0]) if len(self._max) > 0 else None
+
+    @property
+    def mean(self: Self) -> float | None:
+        return self._sum_v / self._count if self._count > 0 else None
+
+    @property
+    def slope(self: Self) -> float | None:
+        denominator = self._count * self._sum_tt - self._sum_t ** 2
+        if self._count < 2 or denominator <= 0:
+            return None
+        return (self._count * self._sum_tv - self._sum_t * self._sum_v) / denominator
+
+
+class LookO2MetricHistory:
+
+    def __init__(self: Self, capacity: int = HISTORY_CAPACITY) -> None:
+        self._buffer = LookO2RingBuffer(capacity)
+        self.hour = LookO2RollingWindow(self._buffer, timedelta(hours=1))
+        self.day = LookO2RollingWindow(self._buffer, timedelta(days=1))
+
+    def add(self: Self, timestamp: float, value: float) -> bool:
+        if len(self._buffer) > 0 and timestamp <= self._buffer.timestamp(self._buffer.end - 1):
+            return False
+        if len(self._buffer) == self._buffer.capacity:
+            for window in (self.hour, self.day):
+                if window.start == self._buffer.start:
+                    window.evict()
+        sequence = self._buffer.append(timestamp, value)
+        self.hour.push(sequence)
+        self.day.push(sequence)
+        return True
+
+    def expire(self: Self, now: float) -> bool:
+        hour_expired = self.hour.expire(now)
+        day_expired = self.day.expire(now)
+        return hour_expired or day_expired
+
+    @property
+    def rate_of_change(self: Self) -> float | None:
+        if len(self._buffer) < 2:
+            return None
+        last = self._buffer.end - 1
+        elapsed = self._buffer.timestamp(last) - self._buffer.timestamp(last - 1)
+        return (self._buffer.value(last) - self._buffer.value(last - 1)) * SECONDS_PER_HOUR / elapsed
+
+    def to_compact(self: Self) -> list[str]:
+        return [base64.b64encode(samples.tobytes()).decode() for samples in self._buffer.samples()]
+
+    @classmethod
+    def from_compact(cls: type[Self], values: list[str]) -> Self:
+        timestamps, samples = array("d"), array("d")
+        timestamps.frombytes(base64.b64decode(values[0]))
+        samples.frombytes(base64.b64decode(values[1]))
+        history = cls()
+        for timestamp, value in zip(timestamps, samples):
+            history.add(timestamp, value)
+        return history
+
+
+class LookO2History:
+
+    def __init__(self: Self) -> None:
+        self._metrics: dict[str, dict[str, LookO2MetricHistory]] = {}
+
+    def get(self: Self, device_id: str, metric: str) -> LookO2MetricHistory:
+        metrics = self._metrics.setdefault(device_id, {})
+        if metric not in metrics:
+            metrics[metric] = LookO2MetricHistory()
+        return metrics[metric]
+
+    def add(self: Self, device: LookO2DeviceData) -> bool:
+        timestamp = device.timestamp.timestamp()
+        added = False
+        for metric in HISTORY_METRICS:
+            added |= self.get(device.device_id, metric).add(timestamp, getattr(device, metric))
+        return added
+
+    def expire(self: Self, now: float) -> set[str]:
+        """Expire all windows and return the devices whose statistics changed."""
+        return {
+            device_id for device_id, metrics in self._metrics.items()
+            if any([history.expire(now) for history in metrics.values()])
+        }
+
+    def to_compact(self: Self) -> dict[str, Any]:
+        return {
+            device_id: {metric: history.to_compact() for metric, history in metrics.items()}
+            for device_id, metrics in self._metrics.items()
+        }
+
+    @classmethod
+    def from_compact(cls: type[Self], data: dict[str, Any], device_ids: list[str]) -> Self:
+        history = cls()
+        for device_id in device_ids:
+            for metric, values in data.get(device_id, {}).items():
+                if metric in HISTORY_METRICS:
+                    history._metrics.setdefault(device_id, {})[metric] = LookO2MetricHistory.from_compact(values)
+        return history
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Final, Self
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMeanType, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import CONCENTRATION_MICROGRAMS_PER_CUBIC_METER, PERCENTAGE, UnitOfTemperature
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util, slugify
+from homeassistant.util.unit_conversion import MassVolumeConcentrationConverter, TemperatureConverter
+
+from .connector.model import LookO2DeviceData
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SECONDS_PER_HOUR: Final = 3600
+
+LONG_TERM_STATISTICS: Final = {
+    "pm1": ("PM1", CONCENTRATION_MICROGRAMS_PER_CUBIC_METER, MassVolumeConcentrationConverter.UNIT_CLASS),
+    "pm25": ("PM2.5", CONCENTRATION_MICROGRAMS_PER_CUBIC_METER, MassVolumeConcentrationConverter.UNIT_CLASS),
+    "pm10": ("PM10", CONCENTRATION_MICROGRAMS_PER_CUBIC_METER, MassVolumeConcentrationConverter.UNIT_CLASS),
+    "temperature": ("Temperature", UnitOfTemperature.CELSIUS, TemperatureConverter.UNIT_CLASS),
+    "humidity": ("Humidity", PERCENTAGE, None),
+}
+
+
+def statistic_id(device_id: str, metric: str) -> str:
+    return f"{DOMAIN}:{slugify(device_id)}_{metric}"
+
+
+@dataclass
+class LookO2HourlyStatistic:
+    start: int
+    count: int = 0
+    total: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def add(self: Self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def to_statistic_data(self: Self) -> StatisticData:
+        return StatisticData(
+            start=dt_util.utc_from_timestamp(self.start),
+            mean=self.total / self.count,
+            min=self.minimum,
+            max=self.maximum,
+        )
+
+    def to_compact(self: Self) -> list[Any]:
+        return [self.start, self.count, self.total, self.minimum, self.maximum]
+
+    @classmethod
+    def from_compact(cls: type[Self], values: list[Any]) -> Self:
+        start, count, total, minimum, maximum = values
+        return cls(int(start), int(count), float(total), float(minimum), float(maximum))
+
+
+class LookO2LongTermStatistics:
+
+    def __init__(self: Self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._epochs: dict[str, int] = {}
+        self._names: dict[str, str] = {}
+        self._hours: dict[str, dict[str, LookO2HourlyStatistic]] = {}
+        self._completed: dict[tuple[str, str], list[LookO2HourlyStatistic]] = {}
+        self.imported = 0
+
+    def add(self: Self, device: LookO2DeviceData) -> bool:
+        """Add a reading to the current hour unless its epoch was already counted."""
+        epoch = int(device.timestamp.timestamp())
+        if epoch <= self._epochs.get(device.device_id, -1):
+            return False
+        self._epochs[device.device_id] = epoch
+        self._names[device.device_id] = device.name
+
+        start = epoch - epoch % SECONDS_PER_HOUR
+        hours = self._hours.setdefault(device.device_id, {})
+        for metric in LONG_TERM_STATISTICS:
+            value = getattr(device, metric)
+            if math.isnan(value):
+                continue
+            hour = hours.get(metric)
+            if hour is None or hour.start != start:
+                if hour is not None:
+                    self._completed.setdefault((device.device_id, metric), []).append(hour)
+                hour = hours[metric] = LookO2HourlyStatistic(start)
+            hour.add(value)
+        return True
+
+    @callback
+    def async_import(self: Self) -> None:
+        """Import completed hours as external statistics, one recorder job per device and metric."""
+        if len(self._completed) == 0:
+            return
+        if "recorder" not in self._hass.config.components:
+            _LOGGER.debug("Recorder is not loaded, dropping %s completed statistics", len(self._completed))
+            self._completed.clear()
+            return
+
+        for (device_id, metric), hours in self._completed.items():
+            async_add_external_statistics(
+                self._hass, self._metadata(device_id, metric), [hour.to_statistic_data() for hour in hours]
+            )
+            self.imported += len(hours)
+        self._completed.clear()
+
+    def _metadata(self: Self, device_id: str, metric: str) -> StatisticMetaData:
+        name, unit, unit_class = LONG_TERM_STATISTICS[metric]
+        return StatisticMetaData(
+            mean_type=StatisticMeanType.ARITHMETIC,
+            has_sum=False,
+            name=f"{self._names[device_id]} {name}",
+            source=DOMAIN,
+            statistic_id=statistic_id(device_id, metric),
+            unit_class=unit_class,
+            unit_of_measurement=unit,
+        )
+
+    def to_compact(self: Self) -> dict[str, Any]:
+        # Open hours and epochs are kept across restarts so readings are neither lost nor counted twice.
+        return {
+            "epochs": self._epochs,
+            "hours": {
+                device_id: {metric: hour.to_compact() for metric, hour in hours.items()}
+                for device_id, hours in self._hours.items()
+            },
+        }
+
+    @classmethod
+    def from_compact(cls: type[Self], hass: HomeAssistant, data: dict[str, Any], device_ids: list[str]) -> Self:
+        statistics = cls(hass)
+        for device_id in device_ids:
+            if device_id in data["epochs"]:
+                statistics._epochs[device_id] = int(data["epochs"][device_id])
+            if device_id in data["hours"]:
+                statistics._hours[device_id] = {
+                    metric: LookO2HourlyStatistic.from_compact(values)
+                    for metric, values in data["hours"][device_id].items()
+                    if metric in LONG_TERM_STATISTICS
+                }
+        return statistics
+
+    def as_dict(self: Self) -> dict[str, Any]:
+        return {
+            "devices": len(self._epochs),
+            "open_hours": sum(len(hours) for hours in self._hours.values()),
+            "imported": self.imported,
+        }
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Self
+
+from aiohttp import ClientError
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .connector.exceptions import LookO2Exception
+from .connector.model import LookO2DevicesDataMap, LookO2DevicesFetchResult
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import LookO2DataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_POOL: HassKey[LookO2DevicePool] = HassKey(f"{DOMAIN}_pool")
+
+
+class LookO2DevicePool:
+
+    def __init__(self: Self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._coordinators: list[LookO2DataUpdateCoordinator] = []
+        self._in_flight: dict[str, asyncio.Task[LookO2DevicesFetchResult]] = {}
+        self._fetching: dict[LookO2DataUpdateCoordinator, set[str]] = {}
+        self.shared_fetches = 0
+        self.fanned_out = 0
+
+    @callback
+    def async_register(self: Self, coordinator: LookO2DataUpdateCoordinator) -> CALLBACK_TYPE:
+        self._coordinators.append(coordinator)
+
+        @callback
+        def unregister() -> None:
+            self._coordinators.remove(coordinator)
+
+        return unregister
+
+    async def async_fetch(
+            self: Self,
+            coordinator: LookO2DataUpdateCoordinator,
+            device_ids: list[str],
+    ) -> LookO2DevicesFetchResult:
+        shared = {device_id: self._in_flight[device_id] for device_id in device_ids if device_id in self._in_flight}
+        missing = [device_id for device_id in device_ids if device_id not in shared]
+        self.shared_fetches += len(shared)
+
+        # A targeted refresh may run next to the periodic one, so each fetch only releases the devices it claimed.
+        fetching = self._fetching.setdefault(coordinator, set())
+        claimed = set(device_ids) - fetching
+        fetching |= claimed
+        try:
+            result = LookO2DevicesFetchResult()
+            if len(missing) > 0:
+                task = self._hass.async_create_task(
+                    coordinator.look_o2_connector.get_devices_data(missing), f"{DOMAIN}_pool_fetch"
+                )
+                for device_id in missing:
+                    self._in_flight[device_id] = task
+                task.add_done_callback(lambda finished: self._release(missing, finished))
+                result = await asyncio.shield(task)
+                self._publish(coordinator, result.data)
+
+            for device_id, shared_task in shared.items():
+                try:
+                    shared_result = await asyncio.shield(shared_task)
+                except (ClientError, TimeoutError, LookO2Exception) as err:
+                    result.errors[device_id] = err
+                    continue
+                # Another entry's "not modified" refers to its own previous data, so it is not carried over.
+                if device_id in shared_result.data:
+                    result.data[device_id] = shared_result.data[device_id]
+                elif device_id in shared_result.errors:
+                    result.errors[device_id] = shared_result.errors[device_id]
+            return result
+        finally:
+            fetching -= claimed
+            if len(fetching) == 0:
+                self._fetching.pop(coordinator, None)
+
+    def _release(self: Self, device_ids: list[str], task: asyncio.Task[Any]) -> None:
+        for device_id in device_ids:
+            if self._in_flight.get(device_id) is task:
+                del self._in_flight[device_id]
+
+    def _publish(self: Self, source: LookO2DataUpdateCoordinator, devices: LookO2DevicesDataMap) -> None:
+        for coordinator in self._coordinators:
+            if coordinator is source or coordinator.data is None:
+                continue
+            fetching = self._fetching.get(coordinator, set())
+            tracked = {
+                device_id: devices[device_id]
+                for device_id in coordinator.look_o2_connector.device_ids or []
+                if device_id in devices and device_id not in fetching
+            }
+            if len(tracked) > 0:
+                _LOGGER.debug("Sharing %s devices fetched by another entry", len(tracked))
+                self.fanned_out += len(tracked)
+                coordinator.async_apply_devices(tracked)
+
+    def as_dict(self: Self) -> dict[str, Any]:
+        return {
+            "entries": len(self._coordinators),
+            "in_flight": len(self._in_flight),
+            "shared_fetches": self.shared_fetches,
+            "fanned_out": self.fanned_out,
+        }
+
+
+@callback
+def async_get_device_pool(hass: HomeAssistant) -> LookO2DevicePool:
+    if DATA_POOL not in hass.data:
+        hass.data[DATA_POOL] = LookO2DevicePool(hass)
+    return hass.data[DATA_POOL]
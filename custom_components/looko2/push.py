@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import logging
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+from homeassistant.components import webhook
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .connector.model import LookO2DeviceData
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .config_flow import LookO2ConfigEntry
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_register_push(hass: HomeAssistant, entry: LookO2ConfigEntry) -> CALLBACK_TYPE:
+    webhook_id = entry.options[CONF_WEBHOOK_ID]
+
+    async def handle_push(_: HomeAssistant, __: str, request: web.Request) -> web.Response:
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.Response(status=HTTPStatus.BAD_REQUEST, text="Invalid JSON")
+
+        records = payload if isinstance(payload, list) else [payload]
+        try:
+            devices = [LookO2DeviceData.from_dict(record) for record in records]
+        except (KeyError, TypeError, ValueError) as err:
+            return web.Response(status=HTTPStatus.BAD_REQUEST, text=f"Invalid reading: {err!r}")
+
+        accepted = entry.runtime_data.coordinator.async_push_devices(devices)
+        return web.json_response({"accepted": accepted, "ignored": len(devices) - accepted})
+
+    webhook.async_register(hass, DOMAIN, entry.title, webhook_id, handle_push, allowed_methods=["POST"])
+    _LOGGER.info("Accepting readings for %s pushed to %s", entry.title, webhook.async_generate_path(webhook_id))
+
+    @callback
+    def unregister() -> None:
+        webhook.async_unregister(hass, webhook_id)
+
+    return unregister
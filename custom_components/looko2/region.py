@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import bisect
+import math
+from itertools import repeat
+from typing import Any, Self
+
+from .connector.columnar import LookO2DeviceTable
+from .connector.geo import haversine_distance
+from .const import REGION_METRICS
+
+
+class LookO2RegionValues:
+
+    def __init__(self: Self) -> None:
+        self._values: dict[str, float] = {}
+        self._sorted: list[tuple[float, str]] = []
+        self._sum = 0.0
+
+    def __len__(self: Self) -> int:
+        return len(self._values)
+
+    def set(self: Self, device_id: str, value: float) -> None:
+        self.remove(device_id)
+        if math.isnan(value):
+            return
+        self._values[device_id] = value
+        bisect.insort(self._sorted, (value, device_id))
+        self._sum += value
+
+    def remove(self: Self, device_id: str) -> None:
+        value = self._values.pop(device_id, None)
+        if value is None:
+            return
+        del self._sorted[bisect.bisect_left(self._sorted, (value, device_id))]
+        # Resetting on empty keeps the running sum from accumulating rounding errors forever.
+        self._sum = self._sum - value if len(self._values) > 0 else 0.0
+
+    @property
+    def mean(self: Self) -> float | None:
+        return self._sum / len(self._values) if len(self._values) > 0 else None
+
+    @property
+    def median(self: Self) -> float | None:
+        count = len(self._sorted)
+        if count == 0:
+            return None
+        middle = count // 2
+        if count % 2 == 1:
+            return self._sorted[middle][0]
+        return (self._sorted[middle - 1][0] + self._sorted[middle][0]) / 2
+
+    @property
+    def maximum(self: Self) -> float | None:
+        return self._sorted[-1][0] if len(self._sorted) > 0 else None
+
+    @property
+    def maximum_device_id(self: Self) -> str | None:
+        return self._sorted[-1][1] if len(self._sorted) > 0 else None
+
+
+class LookO2RegionAggregate:
+
+    def __init__(self: Self, latitude: float, longitude: float, radius_km: float) -> None:
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius_km = radius_km
+        self.names: dict[str, str] = {}
+        self._values = {metric: LookO2RegionValues() for metric in (*REGION_METRICS, "aqi")}
+        self._timestamps: dict[str, int] = {}
+        self._table: LookO2DeviceTable | None = None
+        self._positions: list[int] = []
+
+    def values(self: Self, metric: str) -> LookO2RegionValues:
+        return self._values[metric]
+
+    @property
+    def station_count(self: Self) -> int:
+        return len(self._timestamps)
+
+    def update(self: Self, table: LookO2DeviceTable) -> set[str]:
+        """Apply stations that reported new data since the last update and return their IDs."""
+        if table is not self._table:
+            distances = map(haversine_distance, repeat(self.latitude), repeat(self.longitude),
+                            table.latitude, table.longitude)
+            self._positions = [position for position, distance in enumerate(distances) if distance <= self.radius_km]
+            self._table = table
+
+        device_ids = table.device_ids
+        timestamps = table.column("timestamp")
+        names = table.column("name")
+        columns = {metric: table.column(metric) for metric in self._values}
+        present: set[str] = set()
+        changed: set[str] = set()
+        for position in self._positions:
+            device_id = device_ids[position]
+            present.add(device_id)
+            if self._timestamps.get(device_id) == timestamps[position]:
+                continue
+            self._timestamps[device_id] = timestamps[position]
+            self.names[device_id] = names[position]
+            for metric, values in self._values.items():
+                values.set(device_id, columns[metric][position])
+            changed.add(device_id)
+
+        for device_id in self._timestamps.keys() - present:
+            del self._timestamps[device_id]
+            del self.names[device_id]
+            for values in self._values.values():
+                values.remove(device_id)
+            changed.add(device_id)
+        return changed
+
+    def as_dict(self: Self) -> dict[str, Any]:
+        return {
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "radius_km": self.radius_km,
+            "stations": dict(self.names),
+            **{
+                metric: {"mean": values.mean, "median": values.median, "maximum": values.maximum}
+                for metric, values in self._values.items()
+            },
+        }
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Self
+
+from .connector.model import LookO2DeviceData
+from .const import (
+    CADENCE_SMOOTHING,
+    MAX_POLL_INTERVAL,
+    MIN_POLL_INTERVAL,
+    POLL_DELAY,
+    PUSH_FALLBACK_INTERVAL,
+    REFRESH_MIN_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class LookO2DeviceSchedule:
+    last_timestamp: float | None = None
+    cadence: float | None = None
+    next_fetch: float = 0.0
+    unchanged_polls: int = 0
+    failures: int = 0
+
+
+class LookO2PollingScheduler:
+
+    def __init__(self: Self) -> None:
+        self._schedules: dict[str, LookO2DeviceSchedule] = {}
+
+    def get_schedule(self: Self, device_id: str) -> LookO2DeviceSchedule:
+        return self._schedules.setdefault(device_id, LookO2DeviceSchedule())
+
+    def devices_due(self: Self, device_ids: list[str], now: float) -> list[str]:
+        return [device_id for device_id in device_ids if self.get_schedule(device_id).next_fetch <= now]
+
+    def is_available(self: Self, device_id: str) -> bool:
+        return self.get_schedule(device_id).failures == 0
+
+    def is_fresh(self: Self, device_id: str, now: float) -> bool:
+        """Return whether the device cannot have a newer reading yet, judging by its last epoch and cadence."""
+        schedule = self.get_schedule(device_id)
+        if schedule.last_timestamp is None:
+            return False
+        min_age = max(schedule.cadence or 0.0, REFRESH_MIN_INTERVAL.total_seconds())
+        return now < schedule.last_timestamp + min_age
+
+    def record_failure(self: Self, device_id: str, now: float) -> None:
+        schedule = self.get_schedule(device_id)
+        schedule.failures += 1
+        backoff = min(MIN_POLL_INTERVAL.total_seconds() * 2 ** (schedule.failures - 1),
+                      MAX_POLL_INTERVAL.total_seconds())
+        schedule.next_fetch = now + backoff
+        _LOGGER.debug("Retrying device %s in %.0f s", device_id, backoff)
+
+    def record(self: Self, device: LookO2DeviceData, now: float) -> None:
+        schedule = self.get_schedule(device.device_id)
+        schedule.failures = 0
+        timestamp = device.timestamp.timestamp()
+
+        if schedule.last_timestamp is None:
+            schedule.unchanged_polls = 0
+        elif timestamp > schedule.last_timestamp:
+            period = timestamp - schedule.last_timestamp
+            if schedule.cadence is None:
+                schedule.cadence = period
+            else:
+                schedule.cadence += CADENCE_SMOOTHING * (period - schedule.cadence)
+            schedule.unchanged_polls = 0
+        else:
+            schedule.unchanged_polls += 1
+        schedule.last_timestamp = max(timestamp, schedule.last_timestamp or timestamp)
+
+        min_interval = MIN_POLL_INTERVAL.total_seconds()
+        expected = None
+        if schedule.cadence is not None:
+            expected = schedule.last_timestamp + schedule.cadence + POLL_DELAY.total_seconds()
+
+        if expected is not None and expected > now:
+            schedule.next_fetch = max(expected, now + min_interval)
+        else:
+            backoff = min(min_interval * 2 ** schedule.unchanged_polls, MAX_POLL_INTERVAL.total_seconds())
+            schedule.next_fetch = now + backoff
+
+        _LOGGER.debug("Next fetch of device %s in %.0f s", device.device_id, schedule.next_fetch - now)
+
+    def record_push(self: Self, device: LookO2DeviceData, now: float) -> None:
+        """Record a pushed reading; the device is only polled again if its pushes stop."""
+        self.record(device, now)
+        self.defer(device.device_id, now + PUSH_FALLBACK_INTERVAL.total_seconds())
+
+    def defer(self: Self, device_id: str, until: float) -> None:
+        """Postpone the next fetch without counting a failure, e.g. when the request was refused locally."""
+        schedule = self.get_schedule(device_id)
+        schedule.next_fetch = max(schedule.next_fetch, until)
+
+    def next_interval(self: Self, device_ids: list[str], now: float) -> timedelta:
+        next_fetch = min((self.get_schedule(device_id).next_fetch for device_id in device_ids), default=now)
+        seconds = min(max(next_fetch - now, MIN_POLL_INTERVAL.total_seconds()), MAX_POLL_INTERVAL.total_seconds())
+        return timedelta(seconds=seconds)
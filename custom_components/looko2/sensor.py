@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 from collections.abc import Callable
 from dataclasses import dataclass
+from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -12,20 +13,25 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.const import (
     UnitOfTemperature,
+    UnitOfTime,
     CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
     PERCENTAGE,
     CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER,
     EntityCategory
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import LookO2ConfigEntry
 from .connector.model import LookO2DeviceData
-from .const import CONF_DEVICE_IDS
-from .coordinator import LookO2DataUpdateCoordinator
+from .const import ATTR_STATION_NAME, ATTRIBUTION, CONF_DEVICE_IDS, CONF_REGION
+from .coordinator import LookO2DataUpdateCoordinator, LookO2RegionCoordinator
 from .entity import LookO2Entity
+from .history import LookO2MetricHistory
+from .long_term_statistics import LONG_TERM_STATISTICS
+from .region import LookO2RegionAggregate, LookO2RegionValues
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,6 +41,24 @@ class LookO2SensorEntityDescription(SensorEntityDescription):
     value_fn: Callable[[LookO2DeviceData], StateType]
 
 
+@dataclass(frozen=True, kw_only=True)
+class LookO2StatisticsSensorEntityDescription(SensorEntityDescription):
+    metric: str
+    value_fn: Callable[[LookO2MetricHistory], StateType]
+
+
+@dataclass(frozen=True, kw_only=True)
+class LookO2RegionSensorEntityDescription(SensorEntityDescription):
+    metric: str
+    value_fn: Callable[[LookO2RegionValues], StateType]
+    attributes_fn: Callable[[LookO2RegionAggregate, LookO2RegionValues], dict[str, Any]] | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class LookO2DiagnosticSensorEntityDescription(SensorEntityDescription):
+    value_fn: Callable[[LookO2DataUpdateCoordinator | LookO2RegionCoordinator], StateType]
+
+
 SENSOR_TYPES: tuple[LookO2SensorEntityDescription, ...] = (
     LookO2SensorEntityDescription(
         key="pm1",
@@ -161,6 +185,143 @@ SENSOR_TYPES: tuple[LookO2SensorEntityDescription, ...] = (
 )
 
 
+STATISTICS_METRICS: dict[str, tuple[str, SensorDeviceClass]] = {
+    "pm25": ("PM2.5", SensorDeviceClass.PM25),
+    "pm10": ("PM10", SensorDeviceClass.PM10),
+}
+
+STATISTICS_VALUE_FNS: dict[str, Callable[[LookO2MetricHistory], StateType]] = {
+    "mean_1h": lambda history: history.hour.mean,
+    "min_1h": lambda history: history.hour.minimum,
+    "max_1h": lambda history: history.hour.maximum,
+    "mean_24h": lambda history: history.day.mean,
+    "min_24h": lambda history: history.day.minimum,
+    "max_24h": lambda history: history.day.maximum,
+}
+
+STATISTICS_SENSOR_TYPES: tuple[LookO2StatisticsSensorEntityDescription, ...] = (
+    *(
+        LookO2StatisticsSensorEntityDescription(
+            key=f"{metric}_{statistic}",
+            translation_key=statistic,
+            translation_placeholders={"metric": metric_name},
+            native_unit_of_measurement=CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+            device_class=device_class,
+            state_class=SensorStateClass.MEASUREMENT,
+            suggested_display_precision=0,
+            entity_registry_enabled_default=False,
+            metric=metric,
+            value_fn=value_fn,
+        )
+        for metric, (metric_name, device_class) in STATISTICS_METRICS.items()
+        for statistic, value_fn in STATISTICS_VALUE_FNS.items()
+    ),
+    *(
+        LookO2StatisticsSensorEntityDescription(
+            key=f"{metric}_{statistic}",
+            translation_key=statistic,
+            translation_placeholders={"metric": metric_name},
+            native_unit_of_measurement=f"{CONCENTRATION_MICROGRAMS_PER_CUBIC_METER}/h",
+            state_class=SensorStateClass.MEASUREMENT,
+            suggested_display_precision=1,
+            entity_registry_enabled_default=False,
+            metric=metric,
+            value_fn=value_fn,
+        )
+        for metric, (metric_name, _) in STATISTICS_METRICS.items()
+        for statistic, value_fn in (
+            ("trend", lambda history: history.hour.slope),
+            ("rate_of_change", lambda history: history.rate_of_change),
+        )
+    ),
+)
+
+
+REGION_VALUE_FNS: dict[str, Callable[[LookO2RegionValues], StateType]] = {
+    "mean": lambda values: values.mean,
+    "median": lambda values: values.median,
+    "max": lambda values: values.maximum,
+}
+
+REGION_SENSOR_TYPES: tuple[LookO2RegionSensorEntityDescription, ...] = (
+    *(
+        LookO2RegionSensorEntityDescription(
+            key=f"region_{metric}_{statistic}",
+            translation_key=f"region_{statistic}",
+            translation_placeholders={"metric": metric_name},
+            native_unit_of_measurement=CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
+            device_class=device_class,
+            state_class=SensorStateClass.MEASUREMENT,
+            suggested_display_precision=0,
+            metric=metric,
+            value_fn=value_fn,
+        )
+        for metric, (metric_name, device_class) in STATISTICS_METRICS.items()
+        for statistic, value_fn in REGION_VALUE_FNS.items()
+    ),
+    LookO2RegionSensorEntityDescription(
+        key="region_worst_aqi",
+        translation_key="region_worst_aqi",
+        device_class=SensorDeviceClass.AQI,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        metric="aqi",
+        value_fn=lambda values: values.maximum,
+    ),
+    LookO2RegionSensorEntityDescription(
+        key="region_station_count",
+        translation_key="region_station_count",
+        state_class=SensorStateClass.MEASUREMENT,
+        metric="aqi",
+        value_fn=len,
+    ),
+    LookO2RegionSensorEntityDescription(
+        key="region_worst_station",
+        translation_key="region_worst_station",
+        metric="aqi",
+        value_fn=lambda values: values.maximum_device_id,
+        attributes_fn=lambda aggregate, values: {
+            ATTR_STATION_NAME: aggregate.names.get(values.maximum_device_id),
+        },
+    ),
+)
+
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[LookO2DiagnosticSensorEntityDescription, ...] = (
+    LookO2DiagnosticSensorEntityDescription(
+        key="last_refresh_duration",
+        translation_key="last_refresh_duration",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.refresh_duration.last,
+    ),
+    LookO2DiagnosticSensorEntityDescription(
+        key="api_error_rate",
+        translation_key="api_error_rate",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: (
+            None if (error_rate := coordinator.look_o2_connector.metrics.error_rate) is None else error_rate * 100
+        ),
+    ),
+    LookO2DiagnosticSensorEntityDescription(
+        key="api_requests_24h",
+        translation_key="api_requests_24h",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.look_o2_connector.transport.budget.used(),
+    ),
+)
+
+
 async def async_setup_entry(
         hass: HomeAssistant,
         entry: LookO2ConfigEntry,
@@ -168,11 +329,27 @@ async def async_setup_entry(
 ) -> None:
     coordinator = entry.runtime_data.coordinator
 
+    async_add_entities(
+        LookO2DiagnosticSensorEntity(entry.entry_id, coordinator, description)
+        for description in DIAGNOSTIC_SENSOR_TYPES
+    )
+    if CONF_REGION in entry.options:
+        async_add_entities(
+            LookO2RegionSensorEntity(entry.entry_id, coordinator, description)
+            for description in REGION_SENSOR_TYPES
+        )
+        return
+
     async_add_entities(
         LookO2SensorEntity(device_id, coordinator, description)
         for description in SENSOR_TYPES
         for device_id in entry.options[CONF_DEVICE_IDS]
     )
+    async_add_entities(
+        LookO2StatisticsSensorEntity(device_id, coordinator, description)
+        for description in STATISTICS_SENSOR_TYPES
+        for device_id in entry.options[CONF_DEVICE_IDS]
+    )
 
 
 class LookO2SensorEntity(LookO2Entity, SensorEntity):
@@ -187,10 +364,111 @@ class LookO2SensorEntity(LookO2Entity, SensorEntity):
         """Initialize."""
         super().__init__(device_id, coordinator)
 
-        self._attr_unique_id = f"looko2_sensor_{self._device_id}_{description.key}"
+        self._attr_unique_id = self._create_unique_id(description.key)
         self.entity_description = description
+        if coordinator.long_term_statistics is not None and description.key in LONG_TERM_STATISTICS:
+            # The integration imports hourly statistics itself, so the recorder must not compile its own.
+            self._attr_state_class = None
 
     @property
     def native_value(self) -> StateType:
         """Return the value reported by the sensor."""
         return self.entity_description.value_fn(self.coordinator.data[self._device_id])
+
+
+class LookO2StatisticsSensorEntity(LookO2Entity, SensorEntity):
+    entity_description: LookO2StatisticsSensorEntityDescription
+
+    def __init__(
+            self,
+            device_id: str,
+            coordinator: LookO2DataUpdateCoordinator,
+            description: LookO2StatisticsSensorEntityDescription,
+    ) -> None:
+        """Initialize."""
+        super().__init__(device_id, coordinator)
+
+        self._attr_unique_id = self._create_unique_id(description.key)
+        self.entity_description = description
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the value derived from the local history."""
+        history = self.coordinator.history.get(self._device_id, self.entity_description.metric)
+        return self.entity_description.value_fn(history)
+
+
+class LookO2RegionSensorEntity(CoordinatorEntity[LookO2RegionCoordinator], SensorEntity):
+    _attr_attribution = ATTRIBUTION
+    _attr_has_entity_name = True
+    entity_description: LookO2RegionSensorEntityDescription
+
+    def __init__(
+            self,
+            entry_id: str,
+            coordinator: LookO2RegionCoordinator,
+            description: LookO2RegionSensorEntityDescription,
+    ) -> None:
+        """Initialize."""
+        super().__init__(coordinator)
+
+        self._attr_unique_id = f"looko2_sensor_{entry_id}_{description.key}"
+        self._attr_device_info = coordinator.hub_device_info
+        self.entity_description = description
+        self._last_available: bool | None = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._last_available = self.available
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Skip state writes when no station in the region reported new data."""
+        available = self.available
+        if available == self._last_available and len(self.coordinator.updated_device_ids) == 0:
+            return
+        self._last_available = available
+        super()._handle_coordinator_update()
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the value aggregated over the stations in the region."""
+        return self.entity_description.value_fn(self.coordinator.data.values(self.entity_description.metric))
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        if self.entity_description.attributes_fn is None:
+            return None
+        aggregate = self.coordinator.data
+        return self.entity_description.attributes_fn(aggregate, aggregate.values(self.entity_description.metric))
+
+
+class LookO2DiagnosticSensorEntity(
+    CoordinatorEntity[LookO2DataUpdateCoordinator | LookO2RegionCoordinator], SensorEntity
+):
+    _attr_attribution = ATTRIBUTION
+    _attr_has_entity_name = True
+    entity_description: LookO2DiagnosticSensorEntityDescription
+
+    def __init__(
+            self,
+            entry_id: str,
+            coordinator: LookO2DataUpdateCoordinator | LookO2RegionCoordinator,
+            description: LookO2DiagnosticSensorEntityDescription,
+    ) -> None:
+        """Initialize."""
+        super().__init__(coordinator)
+
+        self._attr_unique_id = f"looko2_sensor_{entry_id}_{description.key}"
+        self._attr_device_info = coordinator.hub_device_info
+        self.entity_description = description
+
+    @property
+    def available(self) -> bool:
+        """Stay available while refreshes fail, since that is when these values matter."""
+        return True
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the value recorded by the instrumentation."""
+        return self.entity_description.value_fn(self.coordinator)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+
+import voluptuous as vol
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr, entity_registry as er
+
+from .const import DOMAIN, SERVICE_REFRESH
+from .coordinator import LookO2DataUpdateCoordinator
+
+REFRESH_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+    }),
+    cv.has_at_least_one_key(ATTR_DEVICE_ID, ATTR_ENTITY_ID),
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+
+    async def refresh(call: ServiceCall) -> None:
+        device_ids = _resolve_device_ids(hass, call)
+        requests = []
+        for entry in hass.config_entries.async_loaded_entries(DOMAIN):
+            coordinator = entry.runtime_data.coordinator
+            if not isinstance(coordinator, LookO2DataUpdateCoordinator):
+                continue
+            tracked = device_ids & set(coordinator.look_o2_connector.device_ids or [])
+            if len(tracked) > 0:
+                requests.append(coordinator.async_request_device_refresh(tracked))
+        if len(requests) == 0:
+            raise ServiceValidationError(translation_domain=DOMAIN, translation_key="no_devices")
+        await asyncio.gather(*requests)
+
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH, refresh, schema=REFRESH_SCHEMA)
+
+
+def _resolve_device_ids(hass: HomeAssistant, call: ServiceCall) -> set[str]:
+    """Map the targeted entities and registry devices to LookO2 device IDs."""
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+
+    registry_device_ids = set(call.data.get(ATTR_DEVICE_ID, []))
+    for entity_id in call.data.get(ATTR_ENTITY_ID, []):
+        entity = entity_registry.async_get(entity_id)
+        if entity is None or entity.platform != DOMAIN or entity.device_id is None:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN, translation_key="invalid_entity",
+                translation_placeholders={"entity_id": entity_id},
+            )
+        registry_device_ids.add(entity.device_id)
+
+    device_ids: set[str] = set()
+    for registry_device_id in registry_device_ids:
+        device = device_registry.async_get(registry_device_id)
+        if device is None:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN, translation_key="invalid_device",
+                translation_placeholders={"device_id": registry_device_id},
+            )
+        device_ids |= {identifier for domain, identifier in device.identifiers if domain == DOMAIN}
+    return device_ids
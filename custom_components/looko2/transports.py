@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import logging
+from typing import Self
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .connector.transport import LookO2Transport
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TRANSPORTS: HassKey[LookO2TransportRegistry] = HassKey(f"{DOMAIN}_transports")
+
+
+class LookO2TransportRegistry:
+
+    def __init__(self: Self) -> None:
+        self._transports: dict[str, LookO2Transport] = {}
+        self._users: dict[str, set[str]] = {}
+
+    def get(self: Self, token: str) -> LookO2Transport | None:
+        return self._transports.get(token)
+
+    @callback
+    def async_acquire(self: Self, token: str, entry_id: str) -> LookO2Transport:
+        """Return the transport shared by all entries of the token, creating it for the first one."""
+        if token not in self._transports:
+            self._transports[token] = LookO2Transport()
+        self._users.setdefault(token, set()).add(entry_id)
+        return self._transports[token]
+
+    @callback
+    def async_release(self: Self, token: str, entry_id: str) -> None:
+        users = self._users.get(token, set())
+        users.discard(entry_id)
+        if len(users) == 0:
+            _LOGGER.debug("Releasing transport of entry %s, no other entry uses its token", entry_id)
+            self._users.pop(token, None)
+            self._transports.pop(token, None)
+
+
+@callback
+def async_get_transports(hass: HomeAssistant) -> LookO2TransportRegistry:
+    if DATA_TRANSPORTS not in hass.data:
+        hass.data[DATA_TRANSPORTS] = LookO2TransportRegistry()
+    return hass.data[DATA_TRANSPORTS]